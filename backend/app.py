@@ -1,28 +1,94 @@
-from flask import Flask, jsonify, request
+import io
+import time
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import db
 import crawler
 import indexing
-import threading
+import cache
+import batch
+import metrics
+from jobs import jobs
 
 app = Flask(__name__)
 CORS(app)
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    if "request_start" in g:
+        metrics.registry.observe("http_request_duration_seconds", time.perf_counter() - g.request_start,
+                                 endpoint=endpoint)
+    metrics.inc("http_requests_total", endpoint=endpoint, status=response.status_code)
+    return response
+
+def profiled_json(compute):
+    # profile=1: Antwort als {"results": ..., "profile": ...} mit Zeiten pro Stufe inkl. Serialisierung
+    with metrics.profile(request.args.get("profile") == "1") as profile:
+        result = compute()
+        with metrics.span("serialize"):
+            body = app.json.dumps(result)
+    if profile is not None:
+        body = f'{{"results": {body}, "profile": {app.json.dumps(profile.report())}}}'
+    return Response(body, mimetype="application/json")
+
 @app.route("/api/search", methods=["GET"])
 def search():
     index = indexing.SearchEngine(db.DB_PATH)
     query= request.args.get("q", "")
-    result  = index.search(query)
-    return jsonify(result)
+    if not any(param in request.args for param in ("offset", "limit", "token")):
+        return profiled_json(lambda: index.search(query))
+
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 100)
+    token = request.args.get("token")
+    return profiled_json(lambda: index.search_page(query, offset, limit, token))
 
 @app.route("/api/start-crawling", methods=["GET","POST"])
 def start_crawling():
-    database = db.Database(db.DB_PATH)
-    pages_table = db.PageTable(database)
-    pages_table.reset()
-    crl = crawler.Crawler()
-    thread = threading.Thread(target=crl.start)
-    thread.start()
-    return jsonify({"status": "Crawling started"}), 202
+    # Standardmäßig wird die gespeicherte Frontier fortgesetzt; restart=1 beginnt wieder bei den Seed-URLs,
+    # recrawl=1 prüft nur fällige Seiten mit bedingten Requests
+    restart = request.args.get("restart") == "1"
+    recrawl = request.args.get("recrawl") == "1"
+
+    def run(job):
+        crl = crawler.create_crawler()
+        if recrawl:
+            crl.recrawl(progress=job.report)
+            return
+        if restart:
+            crl.frontier.reset()
+        crl.start(progress=job.report)
+
+    job, started = jobs.submit("crawl", run)
+    if not started:
+        return jsonify({"status": "Crawling already running", "job_id": job.id}), 409
+    return jsonify({"status": "Crawling started", "job_id": job.id}), 202
+
+@app.route("/api/jobs", methods=["GET"])
+def list_jobs():
+    return jsonify(jobs.list())
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route("/api/cache-stats", methods=["GET"])
+def cache_stats():
+    return jsonify(cache.query_cache.stats())
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics_endpoint():
+    for name, value in cache.query_cache.stats().items():
+        metrics.registry.set(f"query_cache_{name}", value)
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
 
 @app.route("/api/health-check",methods=["GET"])
 def health_check():
@@ -32,14 +98,39 @@ def health_check():
 def performance_report():
     indexer = indexing.SearchEngine(db.DB_PATH)
     query= request.args.get("q", "")
-    indexer.search(query,True)
+    return profiled_json(lambda: indexer.search(query,True))
+
+@app.route("/api/batch-search", methods=["POST"])
+def batch_search():
+    # Query-Datei (qid<TAB>query) als Upload "file" oder direkt als Request-Body
+    upload = request.files.get("file")
+    text = upload.read().decode("utf-8") if upload else request.get_data(as_text=True)
+    workers = min(max(request.args.get("workers", 8, type=int), 1), 32)
+
+    start = time.perf_counter()
+    output = io.StringIO()
+    latencies = batch.BatchSearch(db.DB_PATH, workers).run(batch.read_queries(text.splitlines()), output)
+    if request.args.get("format") == "json":
+        return jsonify({
+            "summary": batch.summarize(latencies, time.perf_counter() - start),
+            "latencies": [{"qid": qid, "ms": round(latency, 2), "hits": hits} for qid, latency, hits in latencies],
+            "results": output.getvalue(),
+        })
+    return Response(output.getvalue(), mimetype="text/tab-separated-values")
 
 
 @app.route("/api/start-indexing", methods=["GET","POST"])
 def start_indexing():
-    database = db.Database(db.DB_PATH)
-    tf_table = db.TfTable(database)
-    tf_table.reset()
-    indexer = indexing.TFIDFIndexer(db.DB_PATH)
-    indexer.compute_and_store()
-    return jsonify({"status": "Indexing started"}), 202
\ No newline at end of file
+    full = request.args.get("full") == "1"
+
+    def run(job):
+        indexer = indexing.TFIDFIndexer(db.DB_PATH)
+        if full:
+            indexer.compute_and_store(progress=job.report)
+        else:
+            indexer.update(progress=job.report)
+
+    job, started = jobs.submit("index", run)
+    if not started:
+        return jsonify({"status": "Indexing already running", "job_id": job.id}), 409
+    return jsonify({"status": "Indexing started", "job_id": job.id}), 202
@@ -0,0 +1,104 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cache
+import db
+import indexing
+import search_index
+
+
+def read_queries(lines):
+    # Format: "qid<TAB>query" pro Zeile; die qid des Aufrufers wird unverändert übernommen
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split("\t", 1) if "\t" in line else line.split(None, 1)
+        if len(parts) == 2:
+            yield parts[0].strip(), parts[1].strip()
+
+
+class BatchSearch:
+    def __init__(self, db_path=db.DB_PATH, workers=os.cpu_count() or 1):
+        self.db_path = db_path
+        self.workers = workers
+        self.engine = indexing.SearchEngine(db_path)
+        self.pages = db.PageTable(db.Database(db_path))
+
+    def run_query(self, qid, query):
+        start = time.perf_counter()
+        terms = self.engine.helper.tokenize(query)
+        generation = search_index.get_index(self.db_path).generation
+        key = self.engine._cache_key(terms, "batch")
+        ranking = cache.query_cache.get(key, generation)
+        if ranking is None:
+            doc_ids, _ = self.engine.ranker.rank(terms)
+            # Score-Spalte wie im Performance-Report: Summe der tf-idf-Gewichte der Anfrageterme, nicht der MMR-Score
+            totals = self.engine.tf.get_all_total_scores(terms)
+            ranking = (doc_ids, {doc_id: totals.get(doc_id, 0.0) for doc_id in doc_ids})
+            cache.query_cache.put(key, ranking, generation)
+        doc_ids, scores = ranking
+        pages = self.pages.get_many(doc_ids, with_content=False)
+        ranked = [doc_id for doc_id in doc_ids if doc_id in pages]
+        lines = [f"{qid}\t{rank}\t{pages[doc_id]['url']}\t{scores[doc_id]:.3f}\n"
+                 for rank, doc_id in enumerate(ranked, start=1)]
+        return qid, lines, (time.perf_counter() - start) * 1000
+
+    def run(self, queries, output):
+        # Begrenztes Fenster offener Anfragen, Ausgabe in Eingabereihenfolge
+        search_index.get_index(self.db_path)
+        latencies = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for qid, query in queries:
+                pending.append(executor.submit(self.run_query, qid, query))
+                if len(pending) >= self.workers * 4:
+                    latencies.append(self._write(pending.popleft().result(), output))
+            while pending:
+                latencies.append(self._write(pending.popleft().result(), output))
+        return latencies
+
+    def _write(self, result, output):
+        qid, lines, latency = result
+        output.writelines(lines)
+        return qid, latency, len(lines)
+
+
+def summarize(latencies, elapsed):
+    values = np.array([latency for _, latency, _ in latencies]) if latencies else np.zeros(1)
+    return {
+        "queries": len(latencies),
+        "total_sec": round(elapsed, 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-Suche über eine Query-Datei (qid<TAB>query)")
+    parser.add_argument("queries", help="Query-Datei, '-' für stdin")
+    parser.add_argument("output", help="Ergebnisdatei (qid, Rang, URL, Score; tab-getrennt)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--db", default=db.DB_PATH)
+    parser.add_argument("--latencies", help="Optionale Datei für Latenzen pro Query (qid, ms, Treffer)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    runner = BatchSearch(args.db, args.workers)
+    source = sys.stdin if args.queries == "-" else open(args.queries, encoding="utf-8")
+    with source, open(args.output, "w", encoding="utf-8", buffering=1 << 20) as output:
+        latencies = runner.run(read_queries(source), output)
+
+    if args.latencies:
+        with open(args.latencies, "w", encoding="utf-8") as f:
+            f.writelines(f"{qid}\t{latency:.2f}\t{hits}\n" for qid, latency, hits in latencies)
+    print(f"✅ Batch abgeschlossen: {summarize(latencies, time.perf_counter() - start)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import db
+import indexing
+from benchmark.corpus import SIZES, CorpusGenerator
+from benchmark.scenarios import SCENARIOS, BenchmarkContext, run_scenario
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduzierbare Benchmarks für Crawler, Indexer und Suche")
+    parser.add_argument("--size", choices=sorted(SIZES), default="1k")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Kommagetrennt aus: {', '.join(SCENARIOS)}")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--crawl-pages", type=int, default=500)
+    parser.add_argument("--crawl-engine", choices=["threads", "async"], default="threads")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="Verzeichnis für die Benchmark-Datenbank (Standard: temporär)")
+    parser.add_argument("--output", help="JSON-Datei für die Ergebnisse (Standard: benchmark/results/)")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unbekannte Szenarien: {', '.join(unknown)}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench-")
+    db_path = os.path.join(workdir, f"bench-{args.size}.db")
+    generator = CorpusGenerator(SIZES[args.size], seed=args.seed)
+
+    start = time.perf_counter()
+    database = db.Database(db_path)
+    database.init()
+    # Ein vorhandener Korpus im --workdir wird wiederverwendet
+    pages = db.PageTable(database).count() or generator.load(database)
+    print(f"✅ Korpus {args.size}: {pages} Seiten in {time.perf_counter() - start:.2f} sec ({db_path})")
+
+    # Für Such-Szenarien ohne Indexing-Szenario einmal ungemessen indexieren
+    if "index" not in scenarios and not database.has_entries()[1]:
+        indexing.TFIDFIndexer(db_path, workers=args.workers).compute_and_store()
+
+    ctx = BenchmarkContext(db_path, list(generator.queries(args.queries)), args.workers,
+                           args.crawl_pages, args.crawl_engine)
+    results = {}
+    for name in scenarios:
+        print(f"⏱️ Szenario {name}...")
+        # Frischer Prozess pro Szenario: Speicherspitze und Caches stammen nicht aus vorherigen Szenarien
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results[name] = executor.submit(run_scenario, name, ctx).result()
+        print(f"   {results[name]}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "corpus": {"size": args.size, "pages": pages, "seed": args.seed, "queries": args.queries},
+        "scenarios": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{args.size}-{report['commit'] or 'local'}-{int(time.time())}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Ergebnisse geschrieben: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import numpy as np
+import db
+
+SIZES = {"1k": 1000, "10k": 10000, "100k": 100000}
+TOPIC_WORDS = ["tubingen", "castle", "neckar", "river", "university", "museum", "market", "food", "drinks",
+               "beer", "wine", "church", "student", "old", "town", "punting", "hike", "garden", "bike", "boris", "palmer"]
+LETTERS = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+
+
+def make_vocabulary(size, rng):
+    # Künstliche Wörter nur aus Buchstaben, damit der Tokenizer sie unverändert übernimmt
+    words = set(TOPIC_WORDS)
+    while len(words) < size:
+        length = int(rng.integers(3, 11))
+        words.add("".join(rng.choice(LETTERS, length)))
+    extra = sorted(words - set(TOPIC_WORDS))
+    rng.shuffle(extra)
+    # Themenwörter zwischen die häufigen Ränge mischen, damit Queries typische Postinglängen treffen
+    vocabulary = extra[:50] + TOPIC_WORDS + extra[50:]
+    return np.array(vocabulary[:size])
+
+
+def zipf_weights(size, exponent):
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+class CorpusGenerator:
+    def __init__(self, pages, vocabulary_size=50000, exponent=1.1, mean_length=400, seed=42):
+        self.pages = pages
+        self.exponent = exponent
+        self.mean_length = mean_length
+        self.rng = np.random.default_rng(seed)
+        self.vocabulary = make_vocabulary(vocabulary_size, self.rng)
+        self.weights = zipf_weights(len(self.vocabulary), exponent)
+
+    def documents(self):
+        lengths = np.clip(self.rng.lognormal(np.log(self.mean_length), 0.6, self.pages), 20, 20 * self.mean_length)
+        for doc_id, length in enumerate(lengths.astype(int), start=1):
+            words = self.vocabulary[self.rng.choice(len(self.vocabulary), length, p=self.weights)]
+            text = " ".join(words)
+            yield f"https://bench.tuebingen.example/page/{doc_id}", f"Page {doc_id} {words[0]}", text
+
+    def queries(self, count, max_terms=3):
+        # Query-Terme aus dem häufigen bis mittleren Bereich der Verteilung ziehen
+        head = min(len(self.vocabulary), 2000)
+        weights = zipf_weights(head, 0.5)
+        for qid in range(1, count + 1):
+            terms = self.vocabulary[self.rng.choice(head, int(self.rng.integers(1, max_terms + 1)), p=weights)]
+            yield str(qid), " ".join(terms)
+
+    def load(self, database, batch_size=1000):
+        database.init()
+        batch = []
+        with database.connect() as conn:
+            cursor = conn.cursor()
+            for page in self.documents():
+                batch.append(page)
+                if len(batch) >= batch_size:
+                    cursor.executemany("INSERT INTO pages (url, title, content, main_text) VALUES (?, ?, ?, ?)",
+                                       [(url, title, text, text) for url, title, text in batch])
+                    batch = []
+            cursor.executemany("INSERT INTO pages (url, title, content, main_text) VALUES (?, ?, ?, ?)",
+                               [(url, title, text, text) for url, title, text in batch])
+            conn.commit()
+        return db.PageTable(database).count()
@@ -0,0 +1,81 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from benchmark.corpus import make_vocabulary, zipf_weights
+
+
+class LocalSite:
+    def __init__(self, pages=1000, links_per_page=8, words_per_page=300, latency=0.0, crawl_delay=None, seed=7):
+        self.pages = pages
+        self.links_per_page = links_per_page
+        self.words_per_page = words_per_page
+        self.latency = latency
+        self.crawl_delay = crawl_delay
+        self.seed = seed
+        self.vocabulary = make_vocabulary(5000, np.random.default_rng(seed))
+        self.weights = zipf_weights(len(self.vocabulary), 1.1)
+        self.requests = 0
+        self.server = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def robots_txt(self):
+        lines = ["User-agent: *", "Disallow: /private/"]
+        if self.crawl_delay is not None:
+            lines.append(f"Crawl-delay: {self.crawl_delay}")
+        return "\n".join(lines) + "\n"
+
+    def page(self, number):
+        # Deterministisch pro Seitennummer, damit wiederholte Läufe dieselbe Site sehen
+        rng = np.random.default_rng(self.seed * 1000003 + number)
+        words = self.vocabulary[rng.choice(len(self.vocabulary), self.words_per_page, p=self.weights)]
+        targets = rng.integers(0, self.pages, self.links_per_page)
+        # Englische Funktionswörter einstreuen, sonst verwirft die Spracherkennung des Crawlers die Seite
+        fillers = np.array(["the", "and", "of", "in", "with", "for"])[rng.integers(0, 6, len(words))]
+        text = " ".join(f"{filler} {word}" for filler, word in zip(fillers, words))
+        links = "".join(f'<li><a href="/page/{target}">{self.vocabulary[target % len(self.vocabulary)]}</a></li>'
+                        for target in targets)
+        return (f"<html><head><title>Page {number}</title><script>var page = {number};</script></head>"
+                f"<body><nav><ul>{links}<li><a href=\"/private/{number}\">private</a></li></ul></nav>"
+                f"<main><p>The page {number} is about {text}.</p></main></body></html>")
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                if self.path == "/robots.txt":
+                    self._send(200, site.robots_txt(), "text/plain")
+                elif self.path.startswith("/page/") and self.path[6:].isdigit() and int(self.path[6:]) < site.pages:
+                    self._send(200, site.page(int(self.path[6:])), "text/html")
+                else:
+                    self._send(404, "not found", "text/plain")
+
+            def _send(self, status, body, content_type):
+                body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
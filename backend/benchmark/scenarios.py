@@ -0,0 +1,131 @@
+import io
+import os
+import resource
+import time
+import numpy as np
+import cache
+import crawler
+import db
+import indexing
+import batch
+import search_index
+from benchmark.local_site import LocalSite
+
+
+def percentiles(values):
+    values = np.array(values, dtype=np.float64) if len(values) else np.zeros(1)
+    return {
+        "count": int(len(values)),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def memory_peak():
+    # ru_maxrss ist unter Linux in KiB und gilt für den ganzen Prozess, daher läuft jedes Szenario in einem
+    # eigenen (run_scenario); Kindprozesse (Indexing-Worker) getrennt ausweisen
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {"max_rss_mb": round(own / 1024, 1), "children_max_rss_mb": round(children / 1024, 1)}
+
+
+class BenchmarkContext:
+    def __init__(self, db_path, queries, workers=None, crawl_pages=500, crawl_engine="threads"):
+        self.db_path = db_path
+        self.queries = queries
+        self.workers = workers
+        self.crawl_pages = crawl_pages
+        self.crawl_engine = crawl_engine
+
+
+def run_index(ctx):
+    start = time.perf_counter()
+    indexer = indexing.TFIDFIndexer(ctx.db_path, workers=ctx.workers)
+    indexer.compute_and_store()
+    elapsed = time.perf_counter() - start
+    database = db.Database(ctx.db_path)
+    with database.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT (SELECT COUNT(*) FROM doc_stats), (SELECT COUNT(*) FROM terms), (SELECT COUNT(*) FROM postings)")
+        documents, terms, postings = cursor.fetchone()
+    return {"seconds": round(elapsed, 3), "documents": documents, "terms": terms, "postings": postings,
+            "documents_per_sec": round(documents / elapsed, 1) if elapsed else None}
+
+
+def run_search(ctx):
+    engine = indexing.SearchEngine(ctx.db_path)
+    # Laden des Index nicht in die erste Query einrechnen
+    search_index.get_index(ctx.db_path)
+    latencies = []
+    for _, query in ctx.queries:
+        # Ohne Cache messen, sonst misst man bei wiederholten Termen nur den Lookup
+        cache.query_cache.clear()
+        start = time.perf_counter()
+        engine.search(query, performance_report=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentiles(latencies)
+
+
+def run_batch(ctx):
+    cache.query_cache.clear()
+    runner = batch.BatchSearch(ctx.db_path, ctx.workers or batch.os.cpu_count() or 1)
+    start = time.perf_counter()
+    results = runner.run(iter(ctx.queries), io.StringIO())
+    elapsed = time.perf_counter() - start
+    summary = percentiles([latency for _, latency, _ in results])
+    summary.update({"seconds": round(elapsed, 3), "queries_per_sec": round(len(results) / elapsed, 1) if elapsed else None})
+    return summary
+
+
+def run_snippets(ctx):
+    engine = indexing.SearchEngine(ctx.db_path)
+    latencies = []
+    results = 0
+    for _, query in ctx.queries:
+        terms = engine.helper.tokenize(query)
+        rows, palmer_score = engine.ranker.retrieve(terms)
+        start = time.perf_counter()
+        results += len(engine._build_results(rows, query, palmer_score, False, terms))
+        latencies.append((time.perf_counter() - start) * 1000)
+    summary = percentiles(latencies)
+    summary["results"] = results
+    return summary
+
+
+def run_crawl(ctx):
+    site = LocalSite(pages=ctx.crawl_pages).start()
+    crawl_db = ctx.db_path.replace(".db", "-crawl.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(crawl_db + suffix):
+            os.remove(crawl_db + suffix)
+    db.Database(crawl_db).init()
+    engine = crawler.AsyncCrawler if ctx.crawl_engine == "async" else crawler.Crawler
+    instance = engine(allowed_domains={"127.0.0.1"}, max_pages=ctx.crawl_pages, delay=0.0,
+                      seed_urls=[f"{site.base_url}/page/0"], db_path=crawl_db)
+    start = time.perf_counter()
+    try:
+        instance.start()
+    finally:
+        site.stop()
+    elapsed = time.perf_counter() - start
+    stored = db.PageTable(db.Database(crawl_db)).count()
+    return {"engine": ctx.crawl_engine, "seconds": round(elapsed, 3), "pages": stored, "requests": site.requests,
+            "pages_per_sec": round(stored / elapsed, 1) if elapsed else None}
+
+
+SCENARIOS = {
+    "index": run_index,
+    "search": run_search,
+    "batch": run_batch,
+    "snippets": run_snippets,
+    "crawl": run_crawl,
+}
+
+
+def run_scenario(name, ctx):
+    result = SCENARIOS[name](ctx)
+    result.update(memory_peak())
+    return result
@@ -0,0 +1,124 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class ResultSet:
+    query: str
+    terms: List[str]
+    doc_ids: List[int]
+    palmer_score: bool
+
+
+class ResultSetCache:
+    def __init__(self, ttl=300, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, result_set):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self._purge_expired()
+            self.entries[token] = (time.monotonic() + self.ttl, result_set)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return token
+
+    def get(self, token):
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is None:
+                return None
+            expires_at, result_set = entry
+            if expires_at < time.monotonic():
+                del self.entries[token]
+                return None
+            return result_set
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        # Einträge sind nach Ablaufzeit sortiert, da die TTL für alle gleich ist
+        while self.entries:
+            token, (expires_at, _) = next(iter(self.entries.items()))
+            if expires_at >= now:
+                break
+            del self.entries[token]
+
+
+class QueryCache:
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def make_key(self, terms, k, lambda_, alpha, *variant):
+        return (tuple(terms), k, lambda_, alpha) + variant
+
+    def get(self, key, generation):
+        with self.lock:
+            self._check_generation(generation)
+            entry = self.entries.get(key)
+            if entry is None or generation != self.generation:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, generation):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            self._check_generation(generation)
+            # Ergebnis einer veralteten Index-Generation nicht mehr speichern
+            if generation != self.generation:
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[0]
+            self.entries[key] = (size, value)
+            self.total_bytes += size
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (evicted_size, _) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "generation": self.generation,
+            }
+
+    def _check_generation(self, generation):
+        if generation > self.generation:
+            self.entries.clear()
+            self.total_bytes = 0
+            self.generation = generation
+
+
+result_sets = ResultSetCache()
+query_cache = QueryCache()
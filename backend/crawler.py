@@ -1,30 +1,131 @@
+import asyncio
+import itertools
+import math
+import os
 import requests
 import sqlite3
 import threading
 import time
-from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from queue import Empty, Full, Queue
 from urllib.parse import urljoin, urlparse
-from urllib.robotparser import RobotFileParser
+import aiohttp
 import tldextract
-from bs4 import BeautifulSoup
-from db import DB_PATH, SEED_URLS
+from readability import Document
+from db import DB_PATH, SEED_URLS, Database, PageTable
+from fingerprint import DuplicateDetector, body_hash, content_hash, simhash
+from robots import RobotsCache
+import frontier
+import metrics
+import page_parser
+
+CRAWLER_ENGINE = os.environ.get("CRAWLER_ENGINE", "threads")
+REVISIT_INTERVAL = 24 * 60 * 60
+MIN_REVISIT_INTERVAL = 60 * 60
+MAX_REVISIT_INTERVAL = 30 * 24 * 60 * 60
+INSERT_PAGE = """
+    INSERT OR IGNORE INTO pages (url, title, content, main_text, content_hash, simhash,
+                                 fetch_status, etag, last_modified, body_hash,
+                                 checked_at, revisit_interval, next_visit_at)
+    VALUES (?, ?, ?, ?, ?, ?, 200, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class PageWriter:
+    def __init__(self, database, batch_size=200, flush_interval=1.0, max_pending=1000):
+        self.database = database
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Begrenzte Queue: ist der Writer im Rückstand, blockiert put() die Fetcher (Backpressure)
+        self.pending = Queue(maxsize=max_pending)
+        self.thread = None
+        self.stopped = False
+
+    def start(self):
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(self, url, title, content, main_text, content_hash, simhash, etag=None, last_modified=None, body_hash=None):
+        now = time.time()
+        self.put_statement(INSERT_PAGE, (url, title, content, main_text, content_hash, simhash, etag, last_modified,
+                                         body_hash, now, REVISIT_INTERVAL, now + REVISIT_INTERVAL))
+
+    def put_statement(self, statement, params):
+        # Mit Timeout, damit ein bei voller Queue wartender Fetcher nach stop() nicht für immer hängen bleibt
+        while not self.stopped:
+            try:
+                self.pending.put((statement, params), timeout=0.5)
+                return
+            except Full:
+                continue
+
+    def stop(self):
+        self.stopped = True
+        self.pending.put(None)
+        self.thread.join()
+
+    def _run(self):
+        batch, deadline, stopping = [], None, False
+        while not stopping:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                page = self.pending.get(timeout=timeout)
+                if page is None:
+                    stopping = True
+                else:
+                    batch.append(page)
+                    deadline = deadline or time.monotonic() + self.flush_interval
+            except Empty:
+                pass
+            # Commit nach Anzahl oder Zeit, nicht pro Seite
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch, deadline = [], None
+
+    def _write(self, batch):
+        try:
+            with self.database.connect() as conn:
+                cursor = conn.cursor()
+                # Aufeinanderfolgende gleiche Statements gemeinsam ausführen, Reihenfolge bleibt erhalten
+                for statement, group in itertools.groupby(batch, key=lambda item: item[0]):
+                    params = [item[1] for item in group]
+                    cursor.executemany(statement, params)
+                    if statement is INSERT_PAGE:
+                        # Gespeicherte Seiten in derselben Transaktion als erledigt markieren (Wiederaufnahme nach Absturz)
+                        cursor.executemany("UPDATE frontier SET state = ?, updated_at = ? WHERE url = ?",
+                                           [(frontier.DONE, time.time(), page[0]) for page in params])
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"[DB Error] {len(batch)} Seiten: {e}")
 
 
 class Crawler:
-    def __init__(self, allowed_domains = {"tuebingen", "tubingen", "tübingen"}, max_pages=2000, threads=8, delay=0.5):
+    def __init__(self, allowed_domains = {"tuebingen", "tubingen", "tübingen"}, max_pages=2000, threads=8, delay=0.5,
+                 seed_urls=SEED_URLS, db_path=DB_PATH):
         self.allowed_domains = allowed_domains
         self.max_pages = max_pages
         self.user_agent = "TüBingCrawler/1.0"
         self.request_delay = delay
         self.worker_threads = threads
+        self.seed_urls = seed_urls
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = self.user_agent
 
         # Shared state
-        self.robot_parsers = {}
         self.url_lock = threading.Lock()
-        self.seen_urls = set()
-        self.english_urls = set()
-        self.frontier = Queue()
+        self.domain_counts = Counter()
+        self.domain_decisions = {}
         self.crawled_count = 0
+        self.stopping = False
+        self.database = Database(db_path)
+        self.frontier = frontier.Frontier(self.database)
+        self.pages = PageTable(self.database)
+        self.writer = PageWriter(self.database)
+        self.duplicates = DuplicateDetector(self.database)
+        self.robots = RobotsCache(self.database, self.user_agent)
+        self.scheduler = HostScheduler(self.request_delay)
 
     def _normalize_url(self, url):
         parsed = urlparse(url)
@@ -38,152 +139,173 @@ class Crawler:
         clean_url = clean_url.replace("//", "/") if "://" not in clean_url else clean_url
         return clean_url.rstrip('/')
     
-    def _content_exists(self, content):
+    def _register_content(self, content):
+        # Exakte Duplikate über den Hash-Index, Beinahe-Duplikate über SimHash-Bänder
         try:
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT 1 FROM pages WHERE content = ? LIMIT 1
-                """, (content,))
-                return cursor.fetchone() is not None
+            return self.duplicates.register(content)
         except sqlite3.Error as e:
             #print(f"[DB Error]: {e}")
-            return False
+            return content_hash(content), simhash(content)
 
     def _is_allowed_by_robots(self, url):
-        parsed = urlparse(url)
-        domain = parsed.netloc
+        return self.robots.allowed(url)
 
-        with self.url_lock:
-            if domain not in self.robot_parsers:
-                rp = RobotFileParser()
-                robots_url = f"{parsed.scheme}://{domain}/robots.txt"
-                try:
-                    response = requests.get(robots_url, headers={'User-Agent': self.user_agent}, timeout=3)
-                    if response.ok:
-                        rp.parse(response.text.splitlines())
-                    else:
-                        rp = None
-                except Exception:
-                    rp = None
-                self.robot_parsers[domain] = rp
-
-            parser = self.robot_parsers[domain]
-            return parser.can_fetch(self.user_agent, url) if parser else True
-
-    def _is_english(self, text):
-        english_words = {"the", "and", "is", "of", "in", "to", "with", "that",
-                         "as", "for", "on", "was", "are", "by", "this", "from"}
-        words = text.lower().split()
-        if len(words) < 20:
-            return False
-        matches = sum(1 for word in words if word in english_words)
-        return matches / len(words) > 0.10
+    def _wait_for_host(self, url):
+        # Crawl-delay pro Host statt pro Worker: alle Worker teilen sich die Zeitfenster eines Hosts
+        host = urlparse(url).netloc
+        if self.robots.crawl_delay(host):
+            self.scheduler.set_delay(host, self.robots.crawl_delay(host))
+        time.sleep(self.scheduler.reserve(host, time.monotonic()))
+
+    def _is_allowed_domain(self, url):
+        # tldextract ist teuer, daher eine Entscheidung pro Host merken
+        host = urlparse(url).netloc
+        allowed = self.domain_decisions.get(host)
+        if allowed is None:
+            domain = tldextract.extract(url).domain
+            allowed = bool(domain) and any(term in domain.lower() for term in self.allowed_domains)
+            self.domain_decisions[host] = allowed
+        return allowed
 
     def _already_crawled(self, url):
+        return self.frontier.contains(url)
+
+    def _priority(self, url, depth, anchor=""):
+        # Flache Seiten zuerst, Links mit relevantem Text bevorzugt, stark vertretene Domains leicht gebremst
+        text = f"{url} {anchor}".lower()
+        relevance = sum(1 for term in self.allowed_domains if term in text)
         with self.url_lock:
-            return url in self.seen_urls
+            domain_count = self.domain_counts[urlparse(url).netloc]
+        return -depth + 0.5 * relevance - 0.1 * math.log1p(domain_count)
 
-    def _is_404_page(self, soup):
-        if soup.title and "404" in soup.title.text.lower():
-            return True
-        if soup.find(text=lambda t: "not found" in t.lower()):
-            return True
-        return False
+    def _enqueue(self, links, depth):
+        entries = [(url, depth, self._priority(url, depth, anchor)) for url, anchor in links]
+        with self.url_lock:
+            self.domain_counts.update(urlparse(url).netloc for url, _ in links)
+        self.frontier.add(entries)
 
-    def _save_page(self, url, title, content):
+    def _extract_main_text(self, html):
         try:
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR IGNORE INTO pages (url, title, content) 
-                    VALUES (?, ?, ?)
-                """, (url, title, content))
-                conn.commit()
-        except sqlite3.Error as e:
-            print(f"[DB Error] {url}: {e}")
-
-    def _process_url(self, url):
-        normalized_url = self._normalize_url(url)
-        normalized_url_without_http = self._normalize_url_without_http(url)
-        # Skip bereits gesehene URLs
-        if self._already_crawled(normalized_url_without_http):
-            return
-        if "/de/" in normalized_url.lower():
-            with self.url_lock:
-                self.seen_urls.add(normalized_url_without_http)
-            return
-
-        if not self._is_allowed_by_robots(normalized_url):
-            with self.url_lock:
-                self.seen_urls.add(normalized_url_without_http)
-            return
+            main_html = Document(html).summary()
+            return page_parser.visible_text(main_html)
+        except Exception:
+            return ""
 
-        try:
-            response = requests.get(normalized_url, headers={'User-Agent': self.user_agent}, timeout=3)
-            if response.status_code != 200:
-                return
+    def _save_page(self, url, title, content, main_text, fingerprint, headers=None, html=None):
+        headers = headers or {}
+        self.writer.put(url, title, content, main_text, *fingerprint, etag=headers.get("ETag"),
+                        last_modified=headers.get("Last-Modified"), body_hash=body_hash(html) if html else None)
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            if self._is_404_page(soup):
-                return
+    def _handle_page(self, normalized_url, normalized_url_without_http, html, headers=None):
+        # Parsen, deduplizieren und speichern; gibt zurück, ob gespeichert wurde, und die Links
+        with metrics.span("crawl.parse"):
+            page = page_parser.parse(html)
+        if page.is_404 or not page.is_english:
+            metrics.inc("crawler_pages_total", outcome="rejected")
+            return False, []
 
-            text = soup.get_text(separator=' ', strip=True)
-            if not self._is_english(text):
-                with self.url_lock:
-                    self.seen_urls.add(normalized_url_without_http)
-                return
+        title = page.title
+        content = page.text
+
+        with metrics.span("crawl.dedup"):
+            fingerprint = self._register_content(content)
+        if fingerprint is None:
+            metrics.inc("crawler_pages_total", outcome="duplicate")
+            return False, []
+
+        with metrics.span("crawl.main_text"):
+            main_text = self._extract_main_text(html) or content
+        with metrics.span("crawl.save"):
+            self._save_page(normalized_url_without_http, title, content, main_text, fingerprint, headers, html)
+        metrics.inc("crawler_pages_total", outcome="saved")
 
-            title = soup.title.string.strip() if soup.title else ""
-            content = text.strip()
+        with self.url_lock:
+            self.crawled_count += 1
+
+        links = []
+        for href, anchor in page.links:
+            clean_url = self._normalize_url(urljoin(normalized_url, href))
+            if self._is_allowed_domain(clean_url) and not self._already_crawled(clean_url):
+                links.append((clean_url, anchor))
+        return True, links
+
+    def _handle_fetched(self, url, depth, html, headers=None):
+        saved, links = self._handle_page(url, self._normalize_url_without_http(url), html, headers)
+        self._enqueue(links, depth + 1)
+        return None if saved else frontier.DONE
+
+    def _skip(self, url):
+        return "/de/" in url.lower()
+
+    def _process_url(self, url, depth):
+        state = frontier.FAILED
+        try:
+            with metrics.span("crawl.robots"):
+                allowed = not self._skip(url) and self._is_allowed_by_robots(url)
+            if not allowed:
+                metrics.inc("crawler_pages_total", outcome="disallowed")
+                state = frontier.DONE
+                return
 
-            if self._content_exists(content):
-                with self.url_lock:
-                    self.seen_urls.add(normalized_url_without_http)
+            self._wait_for_host(url)
+            with metrics.span("crawl.fetch"):
+                response = self.session.get(url, timeout=3)
+                html = response.text
+            if response.status_code != 200:
+                metrics.inc("crawler_pages_total", outcome="http_error")
                 return
-        
-            self._save_page(normalized_url_without_http, title, content)
-
-            with self.url_lock:
-                self.seen_urls.add(normalized_url_without_http)
-                self.english_urls.add(normalized_url_without_http)
-                self.crawled_count += 1
-
-            for link in soup.find_all("a", href=True):
-                href = link["href"]
-                if href.startswith(("mailto:", "tel:", "javascript:", "ftp:", "file:")):
-                    continue
-                if href.endswith((".pdf", ".doc", ".xls", ".ppt")):
-                    #print(f"[Ignored] {normalized_url} - unsupported file type: {href}")
-                    continue
-                absolute_url = urljoin(normalized_url, href)
-                clean_url = self._normalize_url(absolute_url)
-                domain = tldextract.extract(clean_url).domain
-                if domain and any(allowed in domain.lower() for allowed in self.allowed_domains) and not self._already_crawled(clean_url):
-                    self.frontier.put(clean_url)
+
+            state = self._handle_fetched(url, depth, html, response.headers)
 
         except Exception as e:
-            print(f"[Error] {normalized_url}: {str(e)[:100]}")
+            metrics.inc("crawler_pages_total", outcome="error")
+            print(f"[Error] {url}: {str(e)[:100]}")
             print("Mache weiter mit der nächsten URL...")
         finally:
-            time.sleep(self.request_delay)
+            self._finish(url, state)
+
+    def _finish(self, url, state):
+        try:
+            self.frontier.finish(url, state)
+        except sqlite3.Error as e:
+            print(f"[DB Error] Frontier {url}: {e}")
+
+    def _claim(self, limit):
+        # None bei Datenbankfehler (z. B. gesperrt): Aufrufer warten kurz und versuchen es erneut
+        try:
+            return self.frontier.claim(limit)
+        except sqlite3.Error as e:
+            print(f"[DB Error] Frontier: {e}")
+            return None
 
     def _worker(self):
-        while True:
-            if self.crawled_count >= self.max_pages:
-                break
-            url = self.frontier.get()
-            try:
-                self._process_url(url)
-            finally:
-                self.frontier.task_done()
+        while not self.stopping and self.crawled_count < self.max_pages:
+            claimed = self._claim(1)
+            if claimed is None:
+                time.sleep(1)
+                continue
+            if not claimed:
+                if self.frontier.idle():
+                    break
+                time.sleep(0.2)
+                continue
+            url, depth = claimed[0]
+            self._process_url(url, depth)
 
-    def start(self):
+    def _prepare_frontier(self):
+        # Frontier aus der Datenbank fortsetzen; bereits erledigte Seed-URLs werden nicht erneut geladen
+        counts = self.frontier.resume()
+        if counts:
+            print(f"ℹ️  Frontier fortgesetzt: {counts}")
+        self.crawled_count = self.frontier.crawled()
+        self._enqueue([(self._normalize_url(url), "") for url in self.seed_urls], 0)
+
+    def start(self, progress=None):
         print(f"✅ Crawler gestartet (max {self.max_pages} Seiten)...")
         start_time = time.time()
 
-        for url in SEED_URLS:
-            self.frontier.put(self._normalize_url(url))
+        self._prepare_frontier()
+        self.writer.start()
 
         threads = []
         for _ in range(self.worker_threads):
@@ -192,12 +314,243 @@ class Crawler:
             threads.append(t)
 
         try:
-            while self.crawled_count < self.max_pages:
+            while self.crawled_count < self.max_pages and any(t.is_alive() for t in threads):
                 time.sleep(1)
+                if progress:
+                    progress(self.crawled_count, self.max_pages)
         except KeyboardInterrupt:
             print("\n🛑 Crawler manuell gestoppt.")
         finally:
+            # Worker beenden keine neuen URLs mehr; wer noch in writer.put wartet, kommt nach stop() frei
+            self.stopping = True
             for t in threads:
                 t.join(timeout=2)
+            self.writer.stop()
+            print("✅ Crawling abgeschlossen.")
+            print(f"⏱️ Laufzeit: {time.time() - start_time:.2f} Sekunden")
+
+
+    def _next_interval(self, interval, changed):
+        # Geänderte Seiten öfter, unveränderte seltener besuchen
+        interval = interval or REVISIT_INTERVAL
+        interval = interval / 2 if changed else interval * 2
+        return min(max(interval, MIN_REVISIT_INTERVAL), MAX_REVISIT_INTERVAL)
+
+    def _record_visit(self, page, status, changed, headers=None, html_hash=None, update=None):
+        headers = headers or {}
+        now = time.time()
+        interval = self._next_interval(page["revisit_interval"], changed)
+        columns = ["fetch_status = ?", "etag = COALESCE(?, etag)", "last_modified = COALESCE(?, last_modified)",
+                   "body_hash = COALESCE(?, body_hash)", "checked_at = ?", "revisit_interval = ?", "next_visit_at = ?"]
+        params = [status, headers.get("ETag"), headers.get("Last-Modified"), html_hash, now, interval, now + interval]
+        for column, value in (update or {}).items():
+            columns.append(f"{column} = ?")
+            params.append(value)
+        self.writer.put_statement(f"UPDATE pages SET {', '.join(columns)} WHERE id = ?", tuple(params) + (page["id"],))
+
+    def _revisit(self, page):
+        url = page["url"]
+        headers = {}
+        if page["etag"]:
+            headers["If-None-Match"] = page["etag"]
+        if page["last_modified"]:
+            headers["If-Modified-Since"] = page["last_modified"]
+
+        self._wait_for_host(url)
+        try:
+            response = self.session.get(url, headers=headers, timeout=3)
+        except Exception as e:
+            print(f"[Error] {url}: {str(e)[:100]}")
+            self._record_visit(page, 0, changed=False)
+            return "error"
+
+        if response.status_code == 304:
+            self._record_visit(page, 304, changed=False, headers=response.headers)
+            return "unchanged"
+        if response.status_code in (404, 410):
+            # Gelöschte Seiten entfernt das inkrementelle Indexing anschließend aus dem Index
+            self.writer.put_statement("DELETE FROM pages WHERE id = ?", (page["id"],))
+            return "gone"
+        if response.status_code != 200:
+            self._record_visit(page, response.status_code, changed=False)
+            return "error"
+
+        html = response.text
+        html_hash = body_hash(html)
+        if html_hash == page["body_hash"]:
+            self._record_visit(page, 200, changed=False, headers=response.headers)
+            return "unchanged"
+
+        parsed = page_parser.parse(html)
+        digest = content_hash(parsed.text)
+        if digest == page["content_hash"]:
+            self._record_visit(page, 200, changed=False, headers=response.headers, html_hash=html_hash)
+            return "unchanged"
+
+        # Inhalt geändert: der Trigger auf pages setzt done = 0, das nächste Update indexiert neu
+        self._record_visit(page, 200, changed=True, headers=response.headers, html_hash=html_hash, update={
+            "title": parsed.title,
+            "content": parsed.text,
+            "main_text": self._extract_main_text(html) or parsed.text,
+            "content_hash": digest,
+            "simhash": simhash(parsed.text),
+        })
+        return "changed"
+
+    def recrawl(self, progress=None, limit=None):
+        # Nur fällige Seiten mit bedingten Requests prüfen; 304 und gleicher Hash kosten kein Parsen
+        due = self.pages.get_due(time.time(), limit)
+        print(f"🔄 Recrawl von {len(due)} fälligen Seiten...")
+        start_time = time.time()
+        outcomes = Counter()
+
+        self.writer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.worker_threads) as executor:
+                for outcome in executor.map(self._revisit, due):
+                    outcomes[outcome] += 1
+                    if progress:
+                        progress(sum(outcomes.values()), len(due))
+        finally:
+            self.writer.stop()
+        print(f"✅ Recrawl abgeschlossen in {time.time() - start_time:.2f} sec: {dict(outcomes)}")
+        return dict(outcomes)
+
+
+class HostScheduler:
+    def __init__(self, delay):
+        self.delay = delay
+        self.delays = {}
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def set_delay(self, host, delay):
+        self.delays[host] = max(delay, self.delay)
+
+    def reserve(self, host, now):
+        # Zeitfenster pro Host reservieren: verschiedene Hosts laufen parallel, jeder Host bleibt höflich.
+        # Gibt die Wartezeit bis zum reservierten Fenster zurück
+        with self.lock:
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.delays.get(host, self.delay)
+        return slot - now
+
+    async def wait(self, host):
+        delay = self.reserve(host, asyncio.get_running_loop().time())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncCrawler(Crawler):
+    def __init__(self, concurrency=200, per_host_connections=4, timeout=10, **kwargs):
+        super().__init__(**kwargs)
+        self.concurrency = concurrency
+        self.per_host_connections = per_host_connections
+        self.timeout = timeout
+
+    async def _robots_allowed(self, session, url):
+        allowed = await self.robots.allowed_async(session, url)
+        # Crawl-delay aus robots.txt fließt in das Zeitfenster des Hosts ein
+        domain = urlparse(url).netloc
+        if self.robots.crawl_delay(domain):
+            self.scheduler.set_delay(domain, self.robots.crawl_delay(domain))
+        return allowed
+
+    async def _fetch_url(self, session, executor, url, depth):
+        state = frontier.FAILED
+        try:
+            with metrics.span("crawl.robots"):
+                allowed = not self._skip(url) and await self._robots_allowed(session, url)
+            if not allowed:
+                metrics.inc("crawler_pages_total", outcome="disallowed")
+                state = frontier.DONE
+                return
+
+            await self.scheduler.wait(urlparse(url).netloc)
+            with metrics.span("crawl.fetch"):
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        metrics.inc("crawler_pages_total", outcome="http_error")
+                        return
+                    html = await response.text(errors="replace")
+                    headers = response.headers
+            if self.crawled_count >= self.max_pages:
+                state = frontier.QUEUED
+                return
+
+            # Parsen und Speichern blockieren, daher im Thread-Pool neben der Event-Loop
+            state = await asyncio.get_running_loop().run_in_executor(
+                executor, self._handle_fetched, url, depth, html, headers)
+        except asyncio.CancelledError:
+            # Beim Beenden zurück in die Warteschlange statt als fehlgeschlagen markieren
+            state = frontier.QUEUED
+            raise
+        except Exception as e:
+            metrics.inc("crawler_pages_total", outcome="error")
+            print(f"[Error] {url}: {str(e)[:100]}")
+        finally:
+            # Frontier-Schreibzugriff ebenfalls im Thread-Pool, die Event-Loop blockiert nie auf SQLite
+            await asyncio.get_running_loop().run_in_executor(executor, self._finish, url, state)
+
+    async def _async_worker(self, session, executor, queue):
+        while True:
+            url, depth = await queue.get()
+            try:
+                await self._fetch_url(session, executor, url, depth)
+            finally:
+                queue.task_done()
+
+    async def _crawl(self, progress):
+        # Kleiner Puffer im Speicher, die eigentliche Frontier liegt in der Datenbank
+        queue = asyncio.Queue()
+
+        # Keep-Alive-Verbindungen aus einem gemeinsamen Pool, global und pro Host begrenzt
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host_connections)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.worker_threads) as executor:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                             headers={"User-Agent": self.user_agent}) as session:
+                workers = [asyncio.create_task(self._async_worker(session, executor, queue))
+                           for _ in range(self.concurrency)]
+                last_report = 0
+                while self.crawled_count < self.max_pages:
+                    if queue.qsize() < self.concurrency:
+                        claimed = await loop.run_in_executor(executor, self._claim, self.concurrency)
+                        if claimed is None:
+                            await asyncio.sleep(1)
+                            continue
+                        for entry in claimed:
+                            queue.put_nowait(entry)
+                    if queue.empty() and await loop.run_in_executor(executor, self.frontier.idle):
+                        break
+                    await asyncio.sleep(0.05)
+                    if progress and time.time() - last_report >= 1:
+                        progress(self.crawled_count, self.max_pages)
+                        last_report = time.time()
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                # Geholte, aber nicht mehr bearbeitete URLs wieder freigeben
+                while not queue.empty():
+                    await loop.run_in_executor(executor, self._finish, queue.get_nowait()[0], frontier.QUEUED)
+
+    def start(self, progress=None):
+        print(f"✅ Async-Crawler gestartet (max {self.max_pages} Seiten, {self.concurrency} parallele Abrufe)...")
+        start_time = time.time()
+        self._prepare_frontier()
+        self.writer.start()
+        try:
+            asyncio.run(self._crawl(progress))
+        except KeyboardInterrupt:
+            print("\n🛑 Crawler manuell gestoppt.")
+        finally:
+            self.writer.stop()
             print("✅ Crawling abgeschlossen.")
             print(f"⏱️ Laufzeit: {time.time() - start_time:.2f} Sekunden")
+
+
+def create_crawler(**kwargs):
+    if CRAWLER_ENGINE == "async":
+        return AsyncCrawler(**kwargs)
+    return Crawler(**kwargs)
@@ -1,5 +1,8 @@
 import sqlite3
 import os
+import queue
+import threading
+import fingerprint
 
 SEED_URLS = [
     "https://uni-tuebingen.de/en/international/study-in-tuebingen/"
@@ -17,14 +20,105 @@ SEED_URLS = [
 
 ]
 DB_PATH = os.path.join(os.path.dirname(__file__), "data", "search.db")
+INDEX_TABLES = ["terms", "postings", "doc_stats", "term_offsets"]
+SHADOW_SUFFIX = "_next"
+# Indexnamen wandern beim Umbenennen der Tabelle mit; Live- und Schattentabelle wechseln sich daher ab
+POSTINGS_DOC_INDEXES = ("idx_postings_doc_id", "idx_postings_doc_id_next")
+POOL_SIZE = 8
+STATEMENT_CACHE_SIZE = 256
+PRAGMAS = [
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -64000),
+    ("mmap_size", 268435456),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+]
+
+
+class ConnectionPool:
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    def _open(self):
+        # Verbindungen bleiben offen und behalten ihren Statement-Cache über Requests hinweg
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = None
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class PooledConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.pool.release(self.conn)
+            self.conn = None
+        return False
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DB_PATH):
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(db_path)
+        return _pools[key]
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
 
 class Database:
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.pool = get_pool(db_path)
 
     def connect(self):
-        return sqlite3.connect(self.db_path)
+        return PooledConnection(self.pool)
 
     def init(self):
         with self.connect() as conn:
@@ -35,19 +129,54 @@ class Database:
                     url TEXT UNIQUE,
                     title TEXT,
                     content TEXT,
+                    main_text TEXT,
                     crawled_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     done INTEGER DEFAULT 0
                 );
             """)
+            self._ensure_column(cursor, "pages", "main_text", "TEXT")
+            self._ensure_column(cursor, "pages", "content_hash", "TEXT")
+            self._ensure_column(cursor, "pages", "simhash", "INTEGER")
+            # Zählt Inhaltsänderungen; der Index merkt sich die indexierte Version pro Dokument
+            self._ensure_column(cursor, "pages", "version", "INTEGER DEFAULT 0")
+            # Frische: Validatoren für bedingte Requests und adaptives Revisit-Intervall
+            for column, definition in [("fetch_status", "INTEGER"), ("etag", "TEXT"), ("last_modified", "TEXT"),
+                                       ("body_hash", "TEXT"), ("checked_at", "REAL"),
+                                       ("revisit_interval", "REAL"), ("next_visit_at", "REAL")]:
+                self._ensure_column(cursor, "pages", column, definition)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pages_next_visit_at ON pages (next_visit_at);")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pages_content_hash ON pages (content_hash);")
+            self._create_fingerprint_tables(cursor)
+            self._backfill_fingerprints(conn, cursor)
+            self._create_index_tables(cursor)
+            if not self._postings_doc_indexes(cursor, "postings"):
+                cursor.execute("CREATE INDEX idx_postings_doc_id ON postings (doc_id);")
+            # idf wird zur Abfragezeit angewendet, gespeichert wird nur die rohe tf
+            self._drop_column(cursor, "postings", "tfidf")
+            # Normen, mean/variance und Term-Schranken hängen von idf ab und werden beim Laden berechnet
+            self._drop_column(cursor, "terms", "max_score")
+            for column in ("length", "unique_terms", "norm", "mean", "variance", "max_weight"):
+                self._drop_column(cursor, "doc_stats", column)
+            self._ensure_column(cursor, "doc_stats", "signature", "BLOB")
+            self._ensure_column(cursor, "doc_stats", "version", "INTEGER")
+            self._migrate_tfs(cursor)
+            self._migrate_term_offsets(cursor)
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tfs (
-                    id INTEGER PRIMARY KEY,
-                    doc_id INTEGER,
-                    term TEXT,
-                    tf REAL,
-                    idf REAL,
-                    tfidf REAL,
-                    FOREIGN KEY (doc_id) REFERENCES pages(id)
+                CREATE TABLE IF NOT EXISTS frontier (
+                    url TEXT PRIMARY KEY,
+                    state TEXT,
+                    depth INTEGER,
+                    priority REAL,
+                    updated_at REAL
+                );
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_frontier_state_priority ON frontier (state, priority DESC);")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS robots (
+                    domain TEXT PRIMARY KEY,
+                    status INTEGER,
+                    body TEXT,
+                    fetched_at REAL
                 );
             """)
             cursor.execute("""
@@ -55,7 +184,193 @@ class Database:
                     status INTEGER
                 );
             """)
+            cursor.execute("DROP TRIGGER IF EXISTS pages_content_changed")
+            cursor.execute("""
+                CREATE TRIGGER pages_content_changed
+                AFTER UPDATE OF content, main_text ON pages
+                WHEN OLD.content IS NOT NEW.content OR OLD.main_text IS NOT NEW.main_text
+                BEGIN
+                    UPDATE pages SET done = 0, version = version + 1 WHERE id = NEW.id;
+                END;
+            """)
             print("[✅] Datenbank initialisiert:", self.db_path)
+
+    def _create_index_tables(self, cursor, suffix=""):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS terms{suffix} (
+                term_id INTEGER PRIMARY KEY,
+                term TEXT UNIQUE,
+                df INTEGER,
+                idf REAL
+            );
+        """)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS postings{suffix} (
+                term_id INTEGER,
+                doc_id INTEGER,
+                tf REAL,
+                PRIMARY KEY (term_id, doc_id),
+                FOREIGN KEY (term_id) REFERENCES terms{suffix}(term_id),
+                FOREIGN KEY (doc_id) REFERENCES pages(id)
+            ) WITHOUT ROWID;
+        """)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS doc_stats{suffix} (
+                doc_id INTEGER PRIMARY KEY,
+                signature BLOB,
+                version INTEGER,
+                FOREIGN KEY (doc_id) REFERENCES pages(id)
+            );
+        """)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS term_offsets{suffix} (
+                doc_id INTEGER,
+                term_id INTEGER,
+                position INTEGER,
+                PRIMARY KEY (doc_id, term_id)
+            ) WITHOUT ROWID;
+        """)
+
+    def _create_fingerprint_tables(self, cursor):
+        # LSH über SimHash: Signatur in Bänder zerlegen, Kandidaten teilen mindestens ein Band
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS simhash_bands (
+                band INTEGER,
+                bucket INTEGER,
+                doc_id INTEGER,
+                PRIMARY KEY (band, bucket, doc_id),
+                FOREIGN KEY (doc_id) REFERENCES pages(id)
+            ) WITHOUT ROWID;
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_simhash_bands_doc_id ON simhash_bands (doc_id);")
+        band_ids = " UNION ALL ".join(f"SELECT {band} AS band" for band in range(fingerprint.SIMHASH_BANDS))
+        insert_bands = f"""
+            INSERT OR IGNORE INTO simhash_bands (band, bucket, doc_id)
+            SELECT band, (NEW.simhash >> (band * {fingerprint.BAND_BITS})) & {(1 << fingerprint.BAND_BITS) - 1}, NEW.id
+            FROM ({band_ids});
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS pages_simhash_inserted
+            AFTER INSERT ON pages
+            WHEN NEW.simhash IS NOT NULL
+            BEGIN
+                {insert_bands}
+            END;
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS pages_simhash_changed
+            AFTER UPDATE OF simhash ON pages
+            WHEN OLD.simhash IS NOT NEW.simhash
+            BEGIN
+                DELETE FROM simhash_bands WHERE doc_id = OLD.id;
+                {insert_bands}
+            END;
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS pages_simhash_deleted
+            AFTER DELETE ON pages
+            BEGIN
+                DELETE FROM simhash_bands WHERE doc_id = OLD.id;
+            END;
+        """)
+
+    def _backfill_fingerprints(self, conn, cursor):
+        conn.create_function("fingerprint_hash", 1, fingerprint.content_hash, deterministic=True)
+        conn.create_function("fingerprint_simhash", 1, fingerprint.simhash, deterministic=True)
+        cursor.execute("""
+            UPDATE pages SET content_hash = fingerprint_hash(content), simhash = fingerprint_simhash(content)
+            WHERE content_hash IS NULL AND content IS NOT NULL
+        """)
+        if cursor.rowcount > 0:
+            print(f"✅ Fingerprints für {cursor.rowcount} Seiten berechnet.")
+
+    def create_shadow_tables(self):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            for table in INDEX_TABLES:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}{SHADOW_SUFFIX}")
+            self._create_index_tables(cursor, SHADOW_SUFFIX)
+            # doc_id-Index gleich mit aufbauen, damit der Tausch nicht den ganzen Index in seiner Transaktion erstellt
+            live = self._postings_doc_indexes(cursor, "postings")
+            name = next(name for name in POSTINGS_DOC_INDEXES if name not in live)
+            cursor.execute(f"CREATE INDEX {name} ON postings{SHADOW_SUFFIX} (doc_id);")
+            conn.commit()
+
+    def _postings_doc_indexes(self, cursor, table):
+        placeholders = ", ".join("?" for _ in POSTINGS_DOC_INDEXES)
+        cursor.execute(f"""
+            SELECT name FROM sqlite_master
+            WHERE type = 'index' AND tbl_name = ? AND name IN ({placeholders})
+        """, (table,) + POSTINGS_DOC_INDEXES)
+        return {row[0] for row in cursor.fetchall()}
+
+    def swap_shadow_tables(self):
+        # Neue Index-Generation in einer Transaktion aktivieren; Leser sehen alt oder neu, nie halb
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for table in INDEX_TABLES:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                cursor.execute(f"ALTER TABLE {table}{SHADOW_SUFFIX} RENAME TO {table}")
+            # Erst jetzt gelten Seiten als indexiert: die neue Generation enthält sie in der gelesenen Version.
+            # Während des Aufbaus geänderte oder hinzugekommene Seiten bleiben für das nächste Update offen
+            cursor.execute("""
+                UPDATE pages SET done = indexed
+                FROM (
+                    SELECT pages.id AS page_id,
+                           EXISTS (SELECT 1 FROM doc_stats
+                                   WHERE doc_id = pages.id AND version = pages.version) AS indexed
+                    FROM pages
+                ) AS state
+                WHERE pages.id = state.page_id AND pages.done IS NOT state.indexed
+            """)
+            conn.commit()
+
+    def _migrate_tfs(self, cursor):
+        # Altes Layout (term und idf in jeder Zeile) in terms/postings überführen
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'tfs'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("""
+            INSERT OR IGNORE INTO terms (term, df, idf)
+            SELECT term, COUNT(*), MAX(idf) FROM tfs GROUP BY term ORDER BY term
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO postings (term_id, doc_id, tf)
+            SELECT terms.term_id, tfs.doc_id, tfs.tf
+            FROM tfs JOIN terms ON terms.term = tfs.term
+            ORDER BY terms.term_id, tfs.doc_id
+        """)
+        # Ohne doc_stats-Zeile gibt es beim Laden keine Norm; ohne Signaturen fällt MMR auf Kosinus zurück
+        cursor.execute("INSERT OR IGNORE INTO doc_stats (doc_id) SELECT DISTINCT doc_id FROM tfs ORDER BY doc_id")
+        cursor.execute("DROP TABLE tfs")
+        print("✅ Tabelle 'tfs' nach terms/postings migriert.")
+
+    def _migrate_term_offsets(self, cursor):
+        # Term-Strings pro Zeile durch die term_id aus dem Wörterbuch ersetzen
+        cursor.execute("PRAGMA table_info(term_offsets)")
+        if "term" not in {row[1] for row in cursor.fetchall()}:
+            return
+        cursor.execute("ALTER TABLE term_offsets RENAME TO term_offsets_old")
+        self._create_index_tables(cursor)
+        cursor.execute("""
+            INSERT INTO term_offsets (doc_id, term_id, position)
+            SELECT term_offsets_old.doc_id, terms.term_id, term_offsets_old.position
+            FROM term_offsets_old JOIN terms ON terms.term = term_offsets_old.term
+            ORDER BY term_offsets_old.doc_id, terms.term_id
+        """)
+        cursor.execute("DROP TABLE term_offsets_old")
+        print("✅ Tabelle 'term_offsets' auf term_id umgestellt.")
+
+    def _drop_column(self, cursor, table, column):
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+
+    def _ensure_column(self, cursor, table, column, definition):
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
     
     def has_entries(self):
         with self.connect() as conn:
@@ -64,7 +379,7 @@ class Database:
             cursor.execute("SELECT EXISTS(SELECT 1 FROM pages LIMIT 1);")
             pages_exist = cursor.fetchone()[0] == 1
 
-            cursor.execute("SELECT EXISTS(SELECT 1 FROM tfs LIMIT 1);")
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM postings LIMIT 1);")
             tfs_exist = cursor.fetchone()[0] == 1
 
             return pages_exist, tfs_exist
@@ -72,7 +387,7 @@ class Database:
     def drop_all(self):
         with self.connect() as conn:
             cursor = conn.cursor()
-            for table in ["pages", "tfs"]:
+            for table in ["pages", "tfs", "simhash_bands", "robots", "frontier"] + INDEX_TABLES + [table + SHADOW_SUFFIX for table in INDEX_TABLES]:
                 cursor.execute(f"DROP TABLE IF EXISTS {table};")
                 print(f"Tabelle '{table}' gelöscht.")
             print("Alle Tabellen erfolgreich gelöscht.")
@@ -94,24 +409,91 @@ class PageTable:
             row = cursor.fetchone()
             return row[0] if row else None
 
+    def count(self):
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM pages")
+            return cursor.fetchone()[0]
+
+    def get_unindexed_ids(self):
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM pages WHERE done = 0")
+            return [row[0] for row in cursor.fetchall()]
+
+    def iter_chunks(self, chunk_size=500, unindexed_only=False, conn=None):
+        # Keyset-Paginierung: pro Chunk eine kurze Abfrage, kein offener Cursor über den ganzen Korpus
+        last_id = 0
+        while True:
+            if conn is None:
+                with self.db.connect() as own_conn:
+                    chunk = self._fetch_chunk(own_conn, last_id, chunk_size, unindexed_only)
+            else:
+                chunk = self._fetch_chunk(conn, last_id, chunk_size, unindexed_only)
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1][0]
+
+    def _fetch_chunk(self, conn, last_id, chunk_size, unindexed_only):
+        condition = "AND done = 0" if unindexed_only else ""
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT id, content, COALESCE(main_text, content), version
+            FROM pages
+            WHERE id > ? {condition}
+            ORDER BY id
+            LIMIT ?
+        """, (last_id, chunk_size))
+        return cursor.fetchall()
+
+    def get_due(self, now, limit=None):
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute("""
+                SELECT id, url, etag, last_modified, body_hash, content_hash, revisit_interval
+                FROM pages
+                WHERE next_visit_at IS NULL OR next_visit_at <= ?
+                ORDER BY next_visit_at
+                LIMIT ?
+            """, (now, -1 if limit is None else limit))
+            return cursor.fetchall()
+
     def get_all(self):
         with self.db.connect() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute("SELECT id, content FROM pages")
+            cursor.row_factory = sqlite3.Row
+            cursor.execute("SELECT id, content, COALESCE(main_text, content) AS main_text FROM pages")
             return cursor.fetchall()
 
+    def get_many(self, doc_ids, with_content=True):
+        if not doc_ids:
+            return {}
+
+        placeholders = ",".join("?" for _ in doc_ids)
+        content_column = "content" if with_content else "NULL AS content"
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(f"""
+                SELECT id AS doc_id, title, url, {content_column}, COALESCE(main_text, content) AS main_text
+                FROM pages
+                WHERE id IN ({placeholders})
+            """, list(doc_ids))
+            return {row["doc_id"]: row for row in cursor.fetchall()}
+
     def get_metadata(self, doc_id):
         with self.db.connect() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT title, url FROM pages WHERE id = ?", (doc_id,))
             return cursor.fetchone()
            
     def print_all(self):
         with self.db.connect() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM pages")
             rows = cursor.fetchall()
             if not rows:
@@ -134,26 +516,39 @@ class TfTable:
     def reset(self):
         with self.db.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM tfs")
+            cursor.execute("DELETE FROM postings")
+            cursor.execute("DELETE FROM terms")
             conn.commit()
 
-    def insert(self, doc_id, term, tf, idf, tfidf):
+    def insert(self, doc_id, term, tf):
         with self.db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO tfs (doc_id, term, tf, idf, tfidf)
-                VALUES (?, ?, ?, ?, ?)
-            """, (doc_id, term, tf, idf, tfidf))
+                INSERT INTO terms (term, df, idf) VALUES (?, 0, 0)
+                ON CONFLICT (term) DO NOTHING
+            """, (term,))
+            cursor.execute("""
+                INSERT OR REPLACE INTO postings (term_id, doc_id, tf)
+                SELECT term_id, ?, ? FROM terms WHERE term = ?
+            """, (doc_id, tf, term))
+            cursor.execute("""
+                UPDATE terms SET df = (SELECT COUNT(*) FROM postings WHERE postings.term_id = terms.term_id)
+                WHERE term = ?
+            """, (term,))
             conn.commit()
 
     def print_entries(self, limit=500):
         with self.db.connect() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM tfs ORDER BY doc_id, term LIMIT ?", (limit,))
+            cursor.row_factory = sqlite3.Row
+            cursor.execute("""
+                SELECT postings.doc_id, terms.term, postings.tf, terms.idf, postings.tf * terms.idf AS tfidf
+                FROM postings JOIN terms ON terms.term_id = postings.term_id
+                ORDER BY postings.doc_id, terms.term LIMIT ?
+            """, (limit,))
             rows = cursor.fetchall()
             if not rows:
-                print("⚠️  Keine Einträge in der 'tfs'-Tabelle gefunden.")
+                print("⚠️  Keine Einträge in der 'postings'-Tabelle gefunden.")
                 return
             for row in rows:
                 print(f"[doc_id={row['doc_id']}] term='{row['term']}' | tf={row['tf']:.4f} | idf={row['idf']:.4f} | tfidf={row['tfidf']:.4f}")
@@ -162,19 +557,38 @@ class TfTable:
         if not query_terms:
             return {}
 
-        placeholders = ','.join(['?'] * len(query_terms))  # (?, ?, ?, ...)
+        import search_index
+        return search_index.get_index(self.db.db_path).total_scores(query_terms)
+
+        
+class TermOffsetTable:
+    def __init__(self, db: Database):
+        self.db = db
+
+    def reset(self):
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM term_offsets")
+            conn.commit()
+
+    def get_first_positions(self, doc_ids, terms):
+        if not doc_ids or not terms:
+            return {}
+
+        doc_placeholders = ",".join("?" for _ in doc_ids)
+        term_placeholders = ",".join("?" for _ in terms)
         with self.db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(f"""
-                SELECT doc_id, SUM(tfidf) as total
-                FROM tfs
-                WHERE term IN ({placeholders})
+                SELECT doc_id, MIN(position)
+                FROM term_offsets
+                WHERE doc_id IN ({doc_placeholders})
+                  AND term_id IN (SELECT term_id FROM terms WHERE term IN ({term_placeholders}))
                 GROUP BY doc_id
-            """, query_terms)
-            rows = cursor.fetchall()
-            return {doc_id: total if total is not None else 0.0 for doc_id, total in rows}
+            """, list(doc_ids) + list(terms))
+            return dict(cursor.fetchall())
+
 
-        
 class StatusTable:
     def __init__(self, db: Database):
         self.db = db
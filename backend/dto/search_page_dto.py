@@ -0,0 +1,13 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+from dto.result_dto import ResultDto
+
+@dataclass
+class SearchPageDto():
+    token: Optional[str]
+    query: str
+    total: int
+    offset: int
+    limit: int
+    palmer_score: bool
+    results: List[ResultDto] = field(default_factory=list)
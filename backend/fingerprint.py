@@ -0,0 +1,138 @@
+import hashlib
+import re
+import threading
+from collections import defaultdict
+import numpy as np
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+MAX_DISTANCE = SIMHASH_BANDS - 1
+SHINGLE_SIZE = 3
+MASK = (1 << SIMHASH_BITS) - 1
+# Dokument-Signaturen für die Diversität in MMR: breiter als die Duplikat-SimHashes, da hier die
+# Ähnlichkeit selbst geschätzt wird (Streuung des Winkels ~ 1/sqrt(Bits))
+SIGNATURE_BITS = 256
+SIGNATURE_WORDS = SIGNATURE_BITS // 64
+
+_token_pattern = re.compile(r"\w+")
+_bit_shifts = np.arange(SIMHASH_BITS, dtype=np.uint64)
+_popcount_table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+# numpy >= 2.0 zählt Bits direkt
+_bitwise_count = getattr(np, "bitwise_count", None)
+
+
+def normalize(text):
+    return " ".join((text or "").split())
+
+
+def content_hash(text):
+    return hashlib.sha1(normalize(text).encode("utf-8")).hexdigest()
+
+
+def body_hash(markup):
+    return hashlib.sha1(markup.encode("utf-8", errors="replace")).hexdigest()
+
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(text):
+    tokens = _token_pattern.findall((text or "").lower())
+    if len(tokens) >= SHINGLE_SIZE:
+        features = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    else:
+        features = set(tokens)
+    if not features:
+        return None
+
+    hashes = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+    bits = (hashes[:, None] >> _bit_shifts) & np.uint64(1)
+    # Pro Bit abstimmen: gesetzt, wenn mehr als die Hälfte der Features es gesetzt haben
+    votes = bits.sum(axis=0) * 2 > len(hashes)
+    value = int(np.sum(np.uint64(1) << _bit_shifts[votes], dtype=np.uint64))
+    # SQLite speichert nur vorzeichenbehaftete 64-Bit-Integer
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def bands(signature):
+    return [(band, (signature >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1)) for band in range(SIMHASH_BANDS)]
+
+
+def hamming(a, b):
+    return bin((a ^ b) & MASK).count("1")
+
+
+def term_signs(terms):
+    # Pro Term und Bit +1, wenn das Bit im Term-Hash gesetzt ist, sonst -1 (gewichteter SimHash)
+    digests = b"".join(hashlib.blake2b(term.encode("utf-8"), digest_size=SIGNATURE_BITS // 8).digest()
+                       for term in terms)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, SIGNATURE_BITS // 8),
+                         axis=1, bitorder="little")
+    return bits.astype(np.float32) * 2 - 1
+
+
+def pack_signatures(votes):
+    # Bit i aus Spalte i; eine Zeile mit SIGNATURE_WORDS 64-Bit-Wörtern pro Dokument
+    packed = np.packbits(votes > 0, axis=1, bitorder="little")
+    return np.ascontiguousarray(packed).view("<u8")
+
+
+def unpack_signatures(blobs):
+    return np.frombuffer(b"".join(blobs), dtype="<u8").reshape(-1, SIGNATURE_WORDS)
+
+
+def popcount(values):
+    # Gesetzte Bits pro Element eines uint64-Arrays
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if _bitwise_count is not None:
+        return _bitwise_count(values)
+    return _popcount_table[values.view(np.uint8).reshape(values.shape + (8,))].sum(axis=-1, dtype=np.int64)
+
+
+class DuplicateDetector:
+    def __init__(self, database, max_distance=MAX_DISTANCE):
+        self.database = database
+        self.max_distance = max_distance
+        self.lock = threading.Lock()
+        # Seiten dieses Laufs, die evtl. noch in der Writer-Queue stehen
+        self.hashes = set()
+        self.buckets = defaultdict(list)
+
+    def register(self, content):
+        # Gibt (content_hash, simhash) zurück oder None, wenn die Seite ein (Beinahe-)Duplikat ist
+        digest = content_hash(content)
+        signature = simhash(content)
+        with self.lock:
+            if digest in self.hashes or self._is_near_duplicate(signature) or self._stored(digest, signature):
+                return None
+            self.hashes.add(digest)
+            if signature is not None:
+                for key in bands(signature):
+                    self.buckets[key].append(signature)
+        return digest, signature
+
+    def _is_near_duplicate(self, signature, candidates=None):
+        if signature is None:
+            return False
+        if candidates is None:
+            candidates = (other for key in bands(signature) for other in self.buckets.get(key, ()))
+        return any(hamming(signature, other) <= self.max_distance for other in candidates)
+
+    def _stored(self, digest, signature):
+        with self.database.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1", (digest,))
+            if cursor.fetchone() is not None:
+                return True
+            if signature is None:
+                return False
+            # Bei höchstens MAX_DISTANCE abweichenden Bits stimmt mindestens ein Band exakt überein
+            keys = bands(signature)
+            cursor.execute(f"""
+                SELECT DISTINCT pages.simhash
+                FROM simhash_bands JOIN pages ON pages.id = simhash_bands.doc_id
+                WHERE (simhash_bands.band, simhash_bands.bucket) IN (VALUES {",".join("(?, ?)" for _ in keys)})
+            """, [value for key in keys for value in key])
+            return self._is_near_duplicate(signature, [row[0] for row in cursor.fetchall()])
@@ -0,0 +1,133 @@
+import hashlib
+import math
+import threading
+import time
+
+QUEUED = "queued"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+
+class BloomFilter:
+    def __init__(self, capacity=1000000, error_rate=0.0001):
+        self.size = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double Hashing: k Positionen aus einem 128-Bit-Digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class Frontier:
+    def __init__(self, database, capacity=1000000, error_rate=0.0001):
+        self.database = database
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.seen = BloomFilter(capacity, error_rate)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+
+    def resume(self):
+        # Nach einem Abbruch: angefangene URLs erneut einreihen, Bloom-Filter aus der Tabelle aufbauen
+        with self.database.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE frontier SET state = ? WHERE state = ?", (QUEUED, IN_FLIGHT))
+            conn.commit()
+            cursor.execute("SELECT url FROM frontier")
+            seen = BloomFilter(self.capacity, self.error_rate)
+            for (url,) in cursor:
+                seen.add(url)
+            cursor.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state")
+            counts = dict(cursor.fetchall())
+        with self.lock:
+            self.seen = seen
+            self.in_flight = 0
+        return counts
+
+    def reset(self):
+        with self.database.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM frontier")
+            conn.commit()
+        with self.lock:
+            self.seen = BloomFilter(self.capacity, self.error_rate)
+            self.in_flight = 0
+
+    def contains(self, url):
+        with self.lock:
+            return url in self.seen
+
+    def add(self, entries):
+        # entries: (url, depth, priority); bekannte URLs filtert der Bloom-Filter ohne Datenbankzugriff
+        with self.lock:
+            fresh = []
+            for url, depth, priority in entries:
+                if url not in self.seen:
+                    self.seen.add(url)
+                    fresh.append((url, depth, priority))
+        if not fresh:
+            return 0
+        with self.database.connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT OR IGNORE INTO frontier (url, state, depth, priority, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(url, QUEUED, depth, priority, time.time()) for url, depth, priority in fresh])
+            conn.commit()
+        return len(fresh)
+
+    def claim(self, limit=1):
+        with self.database.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE frontier SET state = ?, updated_at = ?
+                WHERE url IN (
+                    SELECT url FROM frontier WHERE state = ? ORDER BY priority DESC LIMIT ?
+                )
+                RETURNING url, depth
+            """, (IN_FLIGHT, time.time(), QUEUED, limit))
+            claimed = cursor.fetchall()
+            conn.commit()
+        with self.lock:
+            self.in_flight += len(claimed)
+        return claimed
+
+    def finish(self, url, state=None):
+        # state None: Seite liegt beim PageWriter, der sie zusammen mit dem Insert auf DONE setzt
+        # in_flight auch bei Datenbankfehlern freigeben; die Zeile bleibt IN_FLIGHT und resume() reiht sie wieder ein
+        try:
+            if state is not None:
+                with self.database.connect() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("UPDATE frontier SET state = ?, updated_at = ? WHERE url = ?",
+                                   (state, time.time(), url))
+                    conn.commit()
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def crawled(self):
+        # Bereits gespeicherte Seiten dieser Frontier (zählen beim Fortsetzen gegen max_pages)
+        with self.database.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*) FROM frontier JOIN pages ON pages.url = frontier.url
+                WHERE frontier.state = ?
+            """, (DONE,))
+            return cursor.fetchone()[0]
+
+    def idle(self):
+        with self.lock:
+            return self.in_flight == 0
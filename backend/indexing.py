@@ -1,78 +1,254 @@
-import sqlite3
 import math
 import time
-from collections import Counter, defaultdict
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import sparse
 from dto.result_dto import ResultDto
-from readability import Document
-from bs4 import BeautifulSoup
+from dto.search_page_dto import SearchPageDto
+import cache
 import db
+import fingerprint
+import metrics
 from ranking import Ranker
+import search_index
+import segment
 import re
 import os
 
+def _analyze_documents(chunk):
+    helper = HelperFunction()
+    analyzed = []
+    for doc_id, content, main_text, _ in chunk:
+        tokens = helper.tokenize(content or "")
+        analyzed.append((doc_id, len(tokens), Counter(tokens), helper.first_positions(main_text or "")))
+    return analyzed
+
+
 class TFIDFIndexer:
-    def __init__(self, db_path):
+    def __init__(self, db_path, workers=None, chunk_size=500, batch_size=50000):
         self.db_path = db_path
-        self.db = db.Database(self.db_path)
-        self.pages = db.PageTable(self.db)
-        self.db = db.TfTable(self.db)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.database = db.Database(self.db_path)
+        self.pages = db.PageTable(self.database)
+        self.tables = {table: table for table in db.INDEX_TABLES}
+        self.full = False
         self.helper = HelperFunction()
     
-    def compute_and_store(self):
-        
+    def compute_and_store(self, progress=None):
+        # Vollständiger Neuaufbau in Schattentabellen; die Suche läuft bis zum Tausch auf der alten Generation
+        with metrics.span("index.prepare"):
+            self.database.create_shadow_tables()
+        # done bleibt während des Aufbaus unberührt und wird erst im Tausch gesetzt; scheitert der Aufbau,
+        # arbeitet das nächste Update mit dem alten Stand weiter
+        self._build(db.SHADOW_SUFFIX, progress, full=True)
+        with metrics.span("index.swap"):
+            self.database.swap_shadow_tables()
+        self._publish()
+
+    def update(self, progress=None):
+        # Ohne Änderungen bleiben Index, Segment und geladene Generation unverändert
+        if self._build("", progress):
+            self._publish()
+
+    def _build(self, suffix, progress, full=False):
         start = time.time()
-        documents = self.pages.get_all()
-        print(f"📄 Indexing {len(documents)} documents...")
-
-        doc_tokens, term_doc_freq = self._tokenize_documents(documents)
-        idf_values = self._compute_idf(term_doc_freq, len(documents))
-        batch = self._build_tfidf_batch(doc_tokens, idf_values)
-
-        self.db.reset()
-        self._store_batch(batch)
+        self.tables = {table: table + suffix for table in db.INDEX_TABLES}
+        self.full = full
+        changed_ids = self.pages.get_all_ids() if full else self.pages.get_unindexed_ids()
+        deleted_ids = [] if full else self._get_orphaned_ids()
+        if not changed_ids and not deleted_ids:
+            print("✅ Index ist aktuell, keine Änderungen")
+            return False
+        print(f"📄 Indexing {len(changed_ids)} neue/geänderte und {len(deleted_ids)} gelöschte Dokumente "
+              f"mit {self.workers} Prozessen...")
+
+        with self.database.connect() as conn:
+            conn.create_function("ln", 1, math.log, deterministic=True)
+            cursor = conn.cursor()
+            # Kurze Schreibtransaktionen (Entfernen, je Chunk, idf), damit Crawler und PageWriter parallel
+            # schreiben können. Die Suche sieht den Stand erst nach _publish bzw. dem Tausch der Schattentabellen
+            with metrics.span("index.remove"):
+                if not full:
+                    self._remove_documents(cursor, changed_ids + deleted_ids)
+                conn.commit()
+
+            cursor.execute(f"SELECT term, term_id, df FROM {self.tables['terms']}")
+            lexicon = cursor.fetchall()
+            term_ids = {term: term_id for term, term_id, _ in lexicon}
+            doc_freq = Counter({term: df for term, _, df in lexicon})
+            cursor.execute(f"SELECT COUNT(*) FROM {self.tables['doc_stats']}")
+            total_docs = cursor.fetchone()[0]
+            indexed = 0
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for chunk, analyzed in self._map_chunks(executor, _analyze_documents, conn):
+                    total_docs += len(analyzed)
+                    with metrics.span("index.add_documents"):
+                        self._add_documents(cursor, chunk, analyzed, term_ids, doc_freq)
+                    with metrics.span("index.commit"):
+                        conn.commit()
+                    indexed += len(analyzed)
+                    if progress:
+                        progress(indexed, len(changed_ids))
+
+            with metrics.span("index.idf"):
+                self._refresh_idf(cursor)
+                conn.commit()
+            with metrics.span("index.signatures"):
+                self._refresh_signatures(conn, cursor, term_ids, doc_freq, total_docs)
+        metrics.inc("indexed_documents_total", indexed)
 
         print(f"✅ Index erstellt in {time.time() - start:.2f} sec")
-
-    
-    def _tokenize_documents(self, documents):
-        doc_tokens = {}
-        term_doc_freq = defaultdict(int)
-
-        
-        for doc in documents:
-            tokens = self.helper.tokenize(doc["content"])
-            doc_tokens[doc["id"]] = tokens
-            for term in set(tokens):
-                term_doc_freq[term] += 1
-
-        return doc_tokens, term_doc_freq
-
-    def _compute_idf(self, term_doc_freq, total_docs):
-        return {
-            term: math.log(total_docs / df)
-            for term, df in term_doc_freq.items()
-        }
-
-    def _build_tfidf_batch(self, doc_tokens, idf_values):
-        batch = []
-        for doc_id, tokens in doc_tokens.items():
-            tf = Counter(tokens)
-            total = len(tokens)
-            for term, count in tf.items():
-                tf_val = count / total
-                idf_val = idf_values.get(term, 0.0)
-                tfidf = tf_val * idf_val
-                batch.append((doc_id, term, tf_val, idf_val, tfidf))
-        return batch
-
-    def _store_batch(self, batch):
-        with sqlite3.connect(self.db_path) as conn:
+        return True
+
+    def _publish(self):
+        # Segmente nur schreiben, wenn die Suche sie auch liest
+        if search_index.INDEX_FORMAT == "segment":
+            with metrics.span("index.segment"):
+                segment.SegmentWriter(self.db_path).write()
+        with metrics.span("index.reload"):
+            search_index.reload_index(self.db_path)
+
+    def _get_orphaned_ids(self):
+        with self.database.connect() as conn:
             cursor = conn.cursor()
-            cursor.executemany("""
-                INSERT INTO tfs (doc_id, term, tf, idf, tfidf)
-                VALUES (?, ?, ?, ?, ?)
-            """, batch)
-            conn.commit()
+            cursor.execute(f"SELECT doc_id FROM {self.tables['doc_stats']} WHERE doc_id NOT IN (SELECT id FROM pages)")
+            return [row[0] for row in cursor.fetchall()]
+
+    def _map_chunks(self, executor, fn, conn):
+        # Der gelesene Chunk wird mitgegeben, damit nur unverändert gebliebene Seiten als indexiert gelten
+        pending = deque()
+        for chunk in self.pages.iter_chunks(self.chunk_size, unindexed_only=not self.full, conn=conn):
+            pending.append((chunk, executor.submit(fn, chunk)))
+            if len(pending) >= self.workers * 2:
+                chunk, future = pending.popleft()
+                yield chunk, self._wait(future)
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, self._wait(future)
+
+    def _wait(self, future):
+        # Wartezeit auf die Analyse-Prozesse, die Analyse selbst läuft außerhalb dieses Prozesses
+        with metrics.span("index.analyze_wait"):
+            return future.result()
+
+    def _remove_documents(self, cursor, doc_ids):
+        if not doc_ids:
+            return
+        terms, postings = self.tables["terms"], self.tables["postings"]
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS stale_docs (doc_id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM stale_docs")
+        cursor.executemany("INSERT OR IGNORE INTO stale_docs (doc_id) VALUES (?)", [(doc_id,) for doc_id in doc_ids])
+        cursor.execute(f"""
+            UPDATE {terms} SET df = df - removed.n
+            FROM (
+                SELECT term_id, COUNT(*) AS n
+                FROM {postings}
+                WHERE doc_id IN (SELECT doc_id FROM stale_docs)
+                GROUP BY term_id
+            ) AS removed
+            WHERE {terms}.term_id = removed.term_id
+        """)
+        for table in ("postings", "doc_stats", "term_offsets"):
+            cursor.execute(f"DELETE FROM {self.tables[table]} WHERE doc_id IN (SELECT doc_id FROM stale_docs)")
+        cursor.execute(f"DELETE FROM {terms} WHERE df <= 0")
+        cursor.execute("DELETE FROM stale_docs")
+
+    def _add_documents(self, cursor, chunk, analyzed, term_ids, doc_freq):
+        terms = self.tables["terms"]
+        term_doc_freq = Counter()
+        for _, _, tf, _ in analyzed:
+            term_doc_freq.update(tf.keys())
+        doc_freq.update(term_doc_freq)
+        for term in term_doc_freq:
+            if term not in term_ids:
+                cursor.execute(f"INSERT INTO {terms} (term, df, idf) VALUES (?, 0, 0)", (term,))
+                term_ids[term] = cursor.lastrowid
+        cursor.executemany(f"UPDATE {terms} SET df = df + ? WHERE term_id = ?",
+                           [(n, term_ids[term]) for term, n in term_doc_freq.items()])
+
+        batch, stats, offsets = [], [], []
+        for (doc_id, total, tf, positions), (_, _, _, version) in zip(analyzed, chunk):
+            batch.extend((term_ids[term], doc_id, count / total) for term, count in tf.items())
+            # Signatur folgt in _refresh_signatures, wenn idf feststeht
+            stats.append((doc_id, None, version))
+            # Nur Terme mit Posting in diesem Dokument, damit jede term_id im Wörterbuch bleibt, solange das Dokument existiert
+            offsets.extend((doc_id, term_ids[term], position) for term, position in positions.items() if term in tf)
+            if len(batch) >= self.batch_size:
+                self._flush(cursor, batch, stats, offsets)
+                batch, stats, offsets = [], [], []
+        self._flush(cursor, batch, stats, offsets)
+        if self.full:
+            return
+        # Seiten, die sich seit dem Lesen geändert haben (Crawler läuft parallel), bleiben für das nächste Update offen
+        cursor.executemany("UPDATE pages SET done = 1 WHERE id = ? AND version = ?",
+                           [(doc_id, version) for doc_id, _, _, version in chunk])
+
+    def _refresh_idf(self, cursor):
+        # Nur idf pro Term; Dokumentnormen und Schranken hängen davon ab und entstehen erst beim Laden des Index
+        terms, doc_stats = self.tables["terms"], self.tables["doc_stats"]
+        cursor.execute(f"SELECT COUNT(*) FROM {doc_stats}")
+        total_docs = cursor.fetchone()[0]
+        cursor.execute(f"UPDATE {terms} SET idf = ln(? * 1.0 / df)", (total_docs,))
+
+    def _refresh_signatures(self, conn, cursor, term_ids, doc_freq, total_docs):
+        # SimHash über den tf-idf-Vektor für die MMR-Diversität, erst nach _refresh_idf und mit dem idf des
+        # fertigen Index, damit eine Seite dieselbe Signatur bekommt, egal wann und in welchem Chunk sie
+        # indexiert wurde. Offen sind die neuen/geänderten Dokumente und Reste abgebrochener Läufe
+        doc_stats, postings = self.tables["doc_stats"], self.tables["postings"]
+        cursor.execute(f"SELECT doc_id FROM {doc_stats} WHERE signature IS NULL ORDER BY doc_id")
+        doc_ids = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+        if not len(doc_ids):
+            return
+        terms = {term_id: term for term, term_id in term_ids.items()}
+        votes = np.zeros((len(doc_ids), fingerprint.SIGNATURE_BITS), dtype=np.float32)
+        for rows in self._signature_postings(cursor, postings, doc_ids):
+            if not rows:
+                continue
+            rows = np.array(rows, dtype=np.float64)
+            positions = np.minimum(np.searchsorted(doc_ids, rows[:, 0]), len(doc_ids) - 1)
+            found = doc_ids[positions] == rows[:, 0]
+            positions, rows = positions[found], rows[found]
+            vocabulary, columns = np.unique(rows[:, 1].astype(np.int64), return_inverse=True)
+            words = [terms[term_id] for term_id in vocabulary.tolist()]
+            idf = np.log(total_docs / np.array([doc_freq[word] for word in words], dtype=np.float64))
+            matrix = sparse.csr_matrix((rows[:, 2] * idf[columns], (positions, columns)),
+                                       shape=(len(doc_ids), len(vocabulary)), dtype=np.float32)
+            votes += matrix @ fingerprint.term_signs(words)
+        signatures = fingerprint.pack_signatures(votes)
+        cursor.executemany(f"UPDATE {doc_stats} SET signature = ? WHERE doc_id = ?",
+                           [(signature.tobytes(), doc_id) for doc_id, signature in zip(doc_ids.tolist(), signatures)])
+        conn.commit()
+
+    def _signature_postings(self, cursor, postings, doc_ids):
+        # Neuaufbau: ein Durchlauf in Tabellenreihenfolge; Update: nur die Postings der offenen Dokumente
+        if self.full:
+            cursor.execute(f"SELECT doc_id, term_id, tf FROM {postings}")
+            yield from iter(lambda: cursor.fetchmany(segment.FETCH_SIZE), [])
+            return
+        for start in range(0, len(doc_ids), self.chunk_size):
+            batch = doc_ids[start:start + self.chunk_size].tolist()
+            placeholders = ", ".join("?" for _ in batch)
+            cursor.execute(f"SELECT doc_id, term_id, tf FROM {postings} WHERE doc_id IN ({placeholders})", batch)
+            yield cursor.fetchall()
+
+    def _flush(self, cursor, batch, stats, offsets):
+        # In Primärschlüssel-Reihenfolge einfügen (geclusterte postings-Tabelle)
+        batch.sort()
+        cursor.executemany(f"""
+            INSERT INTO {self.tables['postings']} (term_id, doc_id, tf)
+            VALUES (?, ?, ?)
+        """, batch)
+        cursor.executemany(f"""
+            INSERT INTO {self.tables['doc_stats']} (doc_id, signature, version)
+            VALUES (?, ?, ?)
+        """, stats)
+        cursor.executemany(f"""
+            INSERT INTO {self.tables['term_offsets']} (doc_id, term_id, position)
+            VALUES (?, ?, ?)
+        """, offsets)
 
 
 class SearchEngine:
@@ -81,20 +257,73 @@ class SearchEngine:
         self.db = db.Database(self.db_path)
         self.pages = db.PageTable(self.db)
         self.helper = HelperFunction()
-        self.ranker = Ranker()
+        self.ranker = Ranker(self.db_path)
         self.tf = db.TfTable(self.db)
+        self.term_offsets = db.TermOffsetTable(self.db)
 
     def search(self, query,performance_report = True):
-        terms = self.helper.tokenize(query)
+        with metrics.span("search.tokenize"):
+            terms = self.helper.tokenize(query)
         if not terms:
             return []
 
-        scored_docs,palmer_score = self._get_ranked_documents(terms)
-        results = self._build_results(scored_docs, query,palmer_score,performance_report,terms)
+        with metrics.span("search.cache"):
+            generation = search_index.get_index(self.db_path).generation
+            key = self._cache_key(terms, "results", performance_report)
+            results = cache.query_cache.get(key, generation)
+        metrics.inc("searches_total", cached="true" if results is not None else "false")
+        if results is None:
+            scored_docs,palmer_score = self._get_ranked_documents(terms)
+            with metrics.span("search.snippets"):
+                results = self._build_results(scored_docs, query,palmer_score,performance_report,terms)
+            cache.query_cache.put(key, results, generation)
         if(performance_report):
-            self.helper.performance_report(results)
+            with metrics.span("search.report"):
+                self.helper.performance_report(results)
         return results
 
+    def search_page(self, query, offset=0, limit=10, token=None):
+        result_set = cache.result_sets.get(token) if token else None
+        if result_set is not None and result_set.query != query:
+            # Token gehört zu einer anderen Suche: ignorieren und neu ranken
+            result_set = None
+        if result_set is None:
+            terms = self.helper.tokenize(query)
+            generation = search_index.get_index(self.db_path).generation
+            key = self._cache_key(terms, "ranking")
+            ranking = cache.query_cache.get(key, generation)
+            metrics.inc("searches_total", cached="true" if ranking is not None else "false")
+            if ranking is None:
+                doc_ids, _ = self.ranker.rank(terms)
+                with metrics.span("rank.palmer"):
+                    palmer_score = self.ranker.contains_boris_palmer(doc_ids) if doc_ids else False
+                ranking = (doc_ids, palmer_score)
+                cache.query_cache.put(key, ranking, generation)
+            doc_ids, palmer_score = ranking
+            result_set = cache.ResultSet(query, terms, doc_ids, palmer_score)
+            token = cache.result_sets.put(result_set) if doc_ids else None
+
+        page_ids = result_set.doc_ids[offset:offset + limit]
+        with metrics.span("retrieve.fetch_pages"):
+            pages = self.pages.get_many(page_ids, with_content=False)
+        rows = [pages[doc_id] for doc_id in page_ids if doc_id in pages]
+        with metrics.span("search.snippets"):
+            results = self._build_results(rows, result_set.query, result_set.palmer_score, False, result_set.terms)
+
+        return SearchPageDto(
+            token=token,
+            query=result_set.query,
+            total=len(result_set.doc_ids),
+            offset=offset,
+            limit=limit,
+            palmer_score=result_set.palmer_score,
+            results=results
+        )
+
+    def _cache_key(self, terms, *variant):
+        return cache.query_cache.make_key(terms, self.ranker.k, self.ranker.lambda_, self.ranker.alpha,
+                                          self.ranker.diversity, *variant)
+
     def _get_ranked_documents(self, terms):
         ranked_docs, palmer_flag = self.ranker.retrieve(terms)
         return ranked_docs, palmer_flag
@@ -107,18 +336,22 @@ class SearchEngine:
         else:
             all_scores = {}
 
+        positions = self.term_offsets.get_first_positions([row["doc_id"] for row in ranked_docs], query_terms)
+
         for row in ranked_docs:
             doc_id = row["doc_id"]
-            meta = self.pages.get_metadata(doc_id)
-            content = self.pages.get_content(doc_id)
-            snippet = self._extract_snippet_from_html(content, query)
+            position = positions.get(doc_id)
+            if position is not None:
+                snippet = self._snippet_at(row["main_text"], position)
+            else:
+                snippet = self._generate_snippet(row["main_text"], query)
 
             score = all_scores.get(doc_id, 0.0) if performance_report else 0.0
 
             result_dto = ResultDto(
                 doc_id=doc_id,
-                title=meta["title"] if meta else "",
-                url=meta["url"] if meta else "",
+                title=row["title"],
+                url=row["url"],
                 palmer_score=palmer_score,
                 snippet=snippet,
                 score=score
@@ -127,15 +360,15 @@ class SearchEngine:
 
         return results
 
-    
-    def _extract_snippet_from_html(self, html: str, query: str, max_chars=250):
-        try:
-            doc = Document(html)
-            main_html = doc.summary()
-            text = BeautifulSoup(main_html, 'html.parser').get_text(separator=' ', strip=True)
-        except Exception:
-            text = BeautifulSoup(html, 'html.parser').get_text(separator=' ', strip=True)
-        return self._generate_snippet(text, query, max_chars=max_chars)
+    def _snippet_at(self, text: str, position: int, window: int = 40, max_chars: int = 250) -> str:
+        # Nur den Textausschnitt um den ersten Treffer betrachten statt den ganzen Text zu splitten
+        reach = window * 20
+        before = text[max(0, position - reach):position].split()
+        if position - reach > 0:
+            before = before[1:]
+        after = text[position:position + reach].split()
+        words = before[-(window // 2):] + after[:window // 2]
+        return " ".join(words).strip()[:max_chars] + "..."
 
     def _generate_snippet(self, text: str, query: str, window: int = 40, max_chars: int = 250) -> str:
         if not text or not query:
@@ -155,14 +388,23 @@ class SearchEngine:
 
 
 class HelperFunction():
-    
-    def tokenize(self,text):
-        stopwords = set([
+    stopwords = set([
         "the", "and", "is", "of", "in", "to", "with", "that", "as", "for", "on",
         "was", "are", "by", "this", "from", "be", "or", "an", "it"
-        ])
-        tokens = re.findall(r'\b[a-zA-Z]{2,}\b', text.lower())
-        return [t for t in tokens if t not in stopwords]
+    ])
+    token_pattern = re.compile(r'\b[a-zA-Z]{2,}\b')
+
+    def tokenize(self,text):
+        tokens = self.token_pattern.findall(text.lower())
+        return [t for t in tokens if t not in self.stopwords]
+
+    def first_positions(self, text):
+        positions = {}
+        for match in self.token_pattern.finditer(text):
+            term = match.group().lower()
+            if term not in self.stopwords and term not in positions:
+                positions[term] = match.start()
+        return positions
     
     def performance_report(self, result):
 
@@ -174,19 +416,31 @@ class HelperFunction():
         filepath = os.path.join(output_dir, filename)
 
         query_number = 1
-        if os.path.exists(filepath):
-            with open(filepath, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                if lines:
-                    last_line = lines[-1]
-                    try:
-                        last_query_num = int(last_line.split("\t")[0])
-                        query_number = last_query_num + 1
-                    except (IndexError, ValueError):
-                        pass
+        last_line = self._last_line(filepath)
+        if last_line:
+            try:
+                last_query_num = int(last_line.split("\t")[0])
+                query_number = last_query_num + 1
+            except (IndexError, ValueError):
+                pass
 
         with open(filepath, "a", encoding="utf-8") as f:
             for rank, dto in enumerate(result[:100], start=1):
                 line = f"{query_number}\t{rank}\t{dto.url}\t{dto.score:.3f}\n"
                 f.write(line)
 
+    def _last_line(self, filepath, block_size=4096):
+        # Nur das Dateiende lesen statt der ganzen Ergebnisdatei
+        if not os.path.exists(filepath):
+            return ""
+        with open(filepath, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0 and data.rstrip(b"\n").count(b"\n") < 1:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data.rstrip(b"\n").split(b"\n")
+        return lines[-1].decode("utf-8", errors="replace") if lines else ""
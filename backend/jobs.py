@@ -0,0 +1,72 @@
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"
+    progress: float = 0.0
+    message: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    def report(self, done, total):
+        self.progress = min(done / total, 1.0) if total else 1.0
+        self.message = f"{done}/{total}"
+
+
+class JobManager:
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, target):
+        with self.lock:
+            running = self._running(kind)
+            if running is not None:
+                return running, False
+            job = Job(id=uuid.uuid4().hex, kind=kind)
+            self.jobs[job.id] = job
+
+        thread = threading.Thread(target=self._run, args=(job, target), daemon=True)
+        thread.start()
+        return job, True
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self.lock:
+            return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _running(self, kind):
+        for job in self.jobs.values():
+            if job.kind == kind and job.status in ("queued", "running"):
+                return job
+        return None
+
+    def _run(self, job, target):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            target(job)
+            job.status = "finished"
+            job.progress = 1.0
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            traceback.print_exc()
+        finally:
+            job.finished_at = time.time()
+
+
+jobs = JobManager()
@@ -1,6 +1,7 @@
 import crawler
 import db 
 import indexing
+import search_index
 import os
 from app import app
 if __name__ == "__main__":
@@ -16,6 +17,9 @@ if __name__ == "__main__":
         print("ℹ️  Datenbank nicht gefunden. Initialisiere Datenbank...")
         database.init()
         status.set_status(NOTHING)
+    else:
+        # Fehlende Tabellen neuerer Versionen anlegen
+        database.init()
     current_status = status.get_status()
     while current_status != BACKEND:
         if(current_status == NOTHING):
@@ -25,16 +29,17 @@ if __name__ == "__main__":
             status.set_status(CRAWLING)
         elif (current_status == CRAWLING):
             print("ℹ️  Datenbank ist bereits initialisiert. Continue mit dem Crawlen...")
-            crawler = crawler.Crawler()
+            crawler = crawler.create_crawler()
             crawler.start()
             status.set_status(INDEXING)
         elif (current_status == INDEXING):
             print("ℹ️  Datenbank ist bereits initialisiert und Crawling ist abgeschlossen. Continue mit dem Indexieren...")
-            index.compute_and_store()
+            index.update()
             status.set_status(BACKEND)
         else:
             print("⚠️ Unbekannter Status in der Datenbank. Bitte überprüfen Sie die Datenbank.")
             exit(1)
         current_status = status.get_status()
+    search_index.get_index(db.DB_PATH)
     print("✅ Backend gestartet.")
     app.run(host="0.0.0.0", port=5050)
@@ -0,0 +1,148 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_profile = contextvars.ContextVar("profile", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def render(self):
+        # Prometheus-Textformat (Version 0.0.4)
+        lines = []
+        with self.lock:
+            for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+                for name, samples in _by_name(metrics).items():
+                    lines.append(f"# TYPE {name} {kind}")
+                    lines.extend(f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples)
+            for name, samples in _by_name(self.histograms).items():
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in samples:
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _by_name(metrics):
+    grouped = {}
+    for (name, labels), value in sorted(metrics.items(), key=lambda item: item[0]):
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        total, calls = self.stages.get(stage, (0.0, 0))
+        self.stages[stage] = (total + seconds, calls + 1)
+
+    def report(self):
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": [{"stage": stage, "ms": round(total * 1000, 3), "calls": calls}
+                       for stage, (total, calls) in self.stages.items()],
+        }
+
+
+class span:
+    # Misst eine Verarbeitungsstufe; die Stufen-Aufschlüsselung wird nur bei aktivem Profil gesammelt
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        registry.observe("stage_duration_seconds", elapsed, stage=self.stage)
+        profile = _profile.get()
+        if profile is not None:
+            profile.add(self.stage, elapsed)
+        return False
+
+
+@contextmanager
+def profile(enabled=True):
+    if not enabled:
+        yield None
+        return
+    current = Profile()
+    token = _profile.set(current)
+    try:
+        yield current
+    finally:
+        _profile.reset(token)
+
+
+def inc(name, amount=1, **labels):
+    registry.inc(name, amount, **labels)
+
+
+registry = Registry()
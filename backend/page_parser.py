@@ -0,0 +1,88 @@
+from dataclasses import dataclass, field
+from lxml import etree, html as lxml_html
+
+ENGLISH_WORDS = {"the", "and", "is", "of", "in", "to", "with", "that",
+                 "as", "for", "on", "was", "are", "by", "this", "from"}
+SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+SKIPPED_SCHEMES = ("mailto:", "tel:", "javascript:", "ftp:", "file:")
+SKIPPED_EXTENSIONS = (".pdf", ".doc", ".xls", ".ppt")
+
+
+@dataclass
+class ParsedPage:
+    title: str = ""
+    text: str = ""
+    words: int = 0
+    english_words: int = 0
+    links: list = field(default_factory=list)
+
+    @property
+    def is_english(self):
+        return self.words >= 20 and self.english_words / self.words > 0.10
+
+    @property
+    def is_404(self):
+        return "404" in self.title.lower() or "not found" in self.text.lower()
+
+
+def _parse_tree(markup):
+    try:
+        return lxml_html.fromstring(markup)
+    except ValueError:
+        # Strings mit XML-Encoding-Deklaration akzeptiert lxml nur als Bytes
+        return lxml_html.fromstring(markup.encode("utf-8"))
+    except etree.ParserError:
+        return None
+
+
+def parse(markup):
+    # Ein Durchlauf über den Baum: Titel, sichtbarer Text, Sprachsignal und Links
+    page = ParsedPage()
+    root = _parse_tree(markup)
+    if root is None:
+        return page
+
+    pieces = []
+    anchors = []
+    skipped = 0
+
+    def add_text(value):
+        value = value.strip() if value else ""
+        if not value:
+            return
+        pieces.append(value)
+        words = value.lower().split()
+        page.words += len(words)
+        page.english_words += sum(1 for word in words if word in ENGLISH_WORDS)
+        for anchor in anchors:
+            anchor[1].append(value)
+
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        tag = element.tag if isinstance(element.tag, str) else None
+        if event == "start":
+            if tag in SKIPPED_TAGS:
+                skipped += 1
+            elif tag is not None and not skipped:
+                if tag == "title" and not page.title:
+                    page.title = (element.text or "").strip()
+                if tag == "a" and element.get("href"):
+                    anchors.append((element.get("href"), []))
+                add_text(element.text)
+            continue
+
+        if tag in SKIPPED_TAGS:
+            skipped -= 1
+        elif tag == "a" and anchors and not skipped and element.get("href") == anchors[-1][0]:
+            href, anchor_text = anchors.pop()
+            if not href.startswith(SKIPPED_SCHEMES) and not href.endswith(SKIPPED_EXTENSIONS):
+                page.links.append((href, " ".join(anchor_text)))
+        if not skipped and element is not root:
+            add_text(element.tail)
+
+    page.text = " ".join(pieces)
+    return page
+
+
+def visible_text(markup):
+    page = parse(markup)
+    return page.text
@@ -7,117 +7,216 @@ Process a textual query and return the 100 most relevant documents from your ind
 ```
 """
 
-import sqlite3
-import math
-from collections import defaultdict
+import os
+import numpy as np
+from scipy import sparse
 import db
+import fingerprint
+import metrics
+import search_index
 
-import math
-import sqlite3
-from collections import defaultdict
-import db
+# "cosine": Redundanz über die Query-Term-Vektoren, "simhash": über die SimHash-Signaturen der Dokumente
+MMR_DIVERSITY = os.environ.get("MMR_DIVERSITY", "cosine")
+# Charikar: Anteil abweichender Bits schätzt den Winkel, cos davon die Kosinus-Ähnlichkeit
+SIGNATURE_SIMILARITY = np.cos(np.pi * np.arange(fingerprint.SIGNATURE_BITS + 1) / fingerprint.SIGNATURE_BITS)
 
 class Ranker:
-    def __init__(self, index_path=db.DB_PATH, k=100, lambda_=0.5, alpha=0.5):
+    def __init__(self, index_path=db.DB_PATH, k=100, lambda_=0.5, alpha=0.5, pool_size=1000, diversity=MMR_DIVERSITY):
         self.index_path = index_path
         self.k = k
         self.lambda_ = lambda_
         self.alpha = alpha
+        self.pool_size = pool_size
+        self.diversity = diversity
+
+    def slice_norms(self, matrix):
+        return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+
+    def normalize_rows(self, matrix, norms):
+        norms = np.where(norms > 0, norms, 1.0)
+        return sparse.diags(1.0 / norms) @ matrix
+
+    def mean_variance_scores(self, matrix):
+        counts = np.diff(matrix.indptr)
+        rows = np.repeat(np.arange(matrix.shape[0]), counts)
+        safe_counts = np.maximum(counts, 1)
+        mean = np.bincount(rows, weights=matrix.data, minlength=matrix.shape[0]) / safe_counts
+        var = np.bincount(rows, weights=(matrix.data - mean[rows]) ** 2, minlength=matrix.shape[0]) / safe_counts
+        return np.where(counts > 0, mean - var, 0.0)
+
+    def load_tfidf_data(self, terms, index):
+        return index.candidate_matrix(terms)
 
-    def cosine(self, v1, v2):
-        denom = math.sqrt(sum(x*x for x in v1.values())) * math.sqrt(sum(x*x for x in v2.values()))
-        if denom == 0:
-            return 0.0
-        return sum(v1.get(k, 0) * v2.get(k, 0) for k in set(v1) | set(v2)) / denom
-
-    def mean_variance_score(self, vec):
-        values = list(vec.values())
-        if not values:
-            return 0.0
-        mean = sum(values) / len(values)
-        var = sum((v - mean)**2 for v in values) / len(values)
-        return mean - var
-
-    def load_tfidf_data(self, terms, conn):
-        tfidf_data = defaultdict(dict)
-        placeholders = ",".join("?" for _ in terms)
-        cur = conn.cursor()
-        cur.execute(f"SELECT doc_id, term, tfidf FROM tfs WHERE term IN ({placeholders})", terms)
-        for doc_id, term, tfidf in cur.fetchall():
-            tfidf_data[doc_id][term] = tfidf
-        return tfidf_data
-
-    def load_idf_values(self, terms, conn):
-        placeholders = ",".join("?" for _ in terms)
-        cur = conn.cursor()
-        cur.execute(f"SELECT term, idf FROM tfs WHERE term IN ({placeholders}) GROUP BY term", terms)
-        return dict(cur.fetchall())
+    def load_idf_values(self, terms, index):
+        return index.idf_values(terms)
 
     def compute_query_vector(self, terms, idf):
         n = len(terms)
         return {t: (1/n) * idf.get(t, 0) for t in terms}
 
-    def rank_documents(self, tfidf_data, query_vec, k, λ, α):
+    def load_doc_stats(self, doc_ids, matrix, index):
+        norms, mv = index.doc_stats(doc_ids)
+        # Fallback für Dokumente ohne Statistik (Index vor Einführung von doc_stats)
+        missing = np.isnan(norms)
+        if missing.any():
+            norms[missing] = self.slice_norms(matrix)[missing]
+            mv[missing] = self.mean_variance_scores(matrix)[missing]
+        return norms, mv
+
+    def lookup_weights(self, doc_ids, postings):
+        # Gewichte eines Terms für beliebige Dokumente; Postings sind nach doc_id sortiert
+        posting_ids, weights = postings
+        if len(posting_ids) == 0:
+            return np.zeros(len(doc_ids))
+        positions = np.minimum(np.searchsorted(posting_ids, doc_ids), len(posting_ids) - 1)
+        return np.where(posting_ids[positions] == doc_ids, weights[positions], 0.0)
+
+    def select_candidates(self, columns, query_vec, index):
+        # Erste Stufe nach MaxScore: nur die pool_size besten Dokumente nach λ·Kosinus + α·mv gehen in die
+        # MMR-Schleife. Terme werden nach oberer Schranke absteigend abgearbeitet; sobald die Schranken der
+        # restlichen Terme die aktuelle Pool-Schwelle nicht mehr erreichen, kommt kein Dokument mehr hinzu.
+        postings = [index.postings(term) for term in columns]
+        query_norm = np.linalg.norm(query_vec)
+        if sum(len(doc_ids) for doc_ids, _ in postings) <= self.pool_size or query_norm == 0:
+            return None
+
+        coefficients = self.lambda_ * query_vec / query_norm
+        # Unendliche Schranke (Dokumente ohne Statistik) mal Gewicht 0 ergibt 0, nicht nan
+        with np.errstate(invalid="ignore"):
+            bounds = np.nan_to_num(coefficients * np.array([index.max_score(term) for term in columns]),
+                                   nan=0.0, posinf=np.inf)
+        order = np.argsort(-bounds, kind="stable")
+        mv_low, mv_high = index.mv_score_range()
+        remaining = np.cumsum(bounds[order][::-1])[::-1] + max(self.alpha * mv_low, self.alpha * mv_high)
+
+        doc_ids = np.zeros(0, dtype=np.int64)
+        weights = np.zeros((0, len(columns)))
+        norms = mv = scores = np.zeros(0)
+        threshold = -np.inf
+        for position, column in enumerate(order):
+            if len(doc_ids) >= self.pool_size and remaining[position] < threshold:
+                break
+            fresh = np.setdiff1d(postings[column][0], doc_ids, assume_unique=True)
+            if len(fresh) == 0:
+                continue
+            fresh_weights = np.column_stack([self.lookup_weights(fresh, entry) for entry in postings])
+            fresh_norms, fresh_mv = self.load_doc_stats(fresh, sparse.csr_matrix(fresh_weights), index)
+            fresh_scores = (self.lambda_ * (fresh_weights / np.where(fresh_norms > 0, fresh_norms, 1.0)[:, None])
+                            @ (query_vec / query_norm) + self.alpha * fresh_mv)
+
+            doc_ids = np.concatenate((doc_ids, fresh))
+            weights = np.vstack((weights, fresh_weights))
+            norms = np.concatenate((norms, fresh_norms))
+            mv = np.concatenate((mv, fresh_mv))
+            scores = np.concatenate((scores, fresh_scores))
+            if len(doc_ids) >= self.pool_size:
+                threshold = np.partition(scores, -self.pool_size)[-self.pool_size]
+
+        pool = np.argpartition(-scores, self.pool_size - 1)[:self.pool_size] if len(doc_ids) > self.pool_size \
+            else np.arange(len(doc_ids))
+        # Reihenfolge nach doc_id wie bei candidate_matrix, damit Gleichstände in MMR gleich aufgelöst werden
+        pool = pool[np.argsort(doc_ids[pool])]
+        return doc_ids[pool], sparse.csr_matrix(weights[pool]), norms[pool], mv[pool]
+
+    def signature_similarity(self, words, best):
+        # words: Signaturen wortweise (Wort × Dokument), damit jede Zeile zusammenhängend im Speicher liegt
+        distance = fingerprint.popcount(words[0] ^ words[0, best]).astype(np.intp)
+        for word in words[1:]:
+            distance += fingerprint.popcount(word ^ word[best])
+        return SIGNATURE_SIMILARITY[distance]
+
+    def rank_documents(self, doc_ids, matrix, query_vec, k, λ, α, norms, mv, signatures=None):
+        n = matrix.shape[0]
+        if n == 0:
+            return [], {}
+
+        matrix = matrix.tocsr()
+        query_norm = np.linalg.norm(query_vec)
+        if query_norm == 0:
+            sim_q = np.zeros(n)
+        else:
+            # Kosinus zur Anfrage über die volle Dokumentnorm
+            sim_q = self.normalize_rows(matrix, norms) @ (query_vec / query_norm)
+
+        words = np.ascontiguousarray(signatures.T) if signatures is not None else None
+        # Redundanz zwischen Dokumenten nur auf den Anfragetermen, normiert auf diesen Ausschnitt
+        normalized = self.normalize_rows(matrix, self.slice_norms(matrix)) if words is None else None
+        # Laufendes Maximum der Ähnlichkeit zu bereits gewählten Dokumenten
+        max_sim = np.zeros(n)
+        available = np.ones(n, dtype=bool)
         selected = []
         scores = {}
 
-        for _ in range(min(k, len(tfidf_data))):
-            best_doc = None
-            best_score = -float("inf")
-            for doc, vec in tfidf_data.items():
-                if doc in selected:
-                    continue
-                sim_q = self.cosine(vec, query_vec)
-                sim_d = max((self.cosine(vec, tfidf_data[d]) for d in selected), default=0)
-                mv = self.mean_variance_score(vec)
-                score = λ * sim_q - (1 - λ) * sim_d + α * mv
-                if score > best_score:
-                    best_score = score
-                    best_doc = doc
-            if best_doc is None:
-                break
-            selected.append(best_doc)
-            scores[best_doc] = best_score
+        for _ in range(min(k, n)):
+            score = λ * sim_q - (1 - λ) * max_sim + α * mv
+            score[~available] = -np.inf
+            best = int(np.argmax(score))
+            available[best] = False
+            doc_id = int(doc_ids[best])
+            selected.append(doc_id)
+            scores[doc_id] = float(score[best])
+            if words is not None:
+                np.maximum(max_sim, self.signature_similarity(words, best), out=max_sim)
+            else:
+                best_vec = normalized.getrow(best).toarray().ravel()
+                np.maximum(max_sim, normalized @ best_vec, out=max_sim)
 
         return selected, scores
 
-    def retrieve(self, terms):
+    def rank(self, terms):
         if not terms:
-            return [], False
+            return [], {}
+
+        index = search_index.get_index(self.index_path)
+        idf = self.load_idf_values(terms, index)
+        query_weights = self.compute_query_vector(terms, idf)
+        columns = list(dict.fromkeys(terms))
+        query_vec = np.array([query_weights[t] for t in columns], dtype=np.float64)
+
+        with metrics.span("rank.candidates"):
+            candidates = self.select_candidates(columns, query_vec, index)
+        if candidates is not None:
+            doc_ids, matrix, norms, mv = candidates
+        else:
+            with metrics.span("rank.load_tfidf"):
+                doc_ids, columns, matrix = self.load_tfidf_data(terms, index)
+            with metrics.span("rank.doc_stats"):
+                norms, mv = self.load_doc_stats(doc_ids, matrix, index)
+        # Ohne Signaturen (Index vor deren Einführung) bleibt es bei der Kosinus-Redundanz
+        signatures = index.doc_signatures(doc_ids) if self.diversity == "simhash" else None
+        with metrics.span("rank.mmr"):
+            return self.rank_documents(doc_ids, matrix, query_vec, self.k, self.lambda_, self.alpha, norms, mv,
+                                       signatures)
+
+    def contains_boris_palmer(self, doc_ids):
+        # Nur Dokumente prüfen, die laut Index beide Terme enthalten
+        index = search_index.get_index(self.index_path)
+        candidates = set(doc_ids)
+        for term in ("boris", "palmer"):
+            candidates &= set(index.postings(term)[0].tolist())
+        if not candidates:
+            return False
+
+        page_table = db.PageTable(db.Database(self.index_path))
+        pages = page_table.get_many(sorted(candidates))
+        return any(
+            row["content"] and "boris palmer" in row["content"].lower()
+            for row in pages.values()
+        )
 
-        with sqlite3.connect(self.index_path) as conn:
-            conn.row_factory = sqlite3.Row
-
-            tfidf_data = self.load_tfidf_data(terms, conn)
-            idf = self.load_idf_values(terms, conn)
-
-            query_vec = self.compute_query_vector(terms, idf)
-            selected_docs, scores = self.rank_documents(tfidf_data, query_vec, self.k, self.lambda_, self.alpha)
-
-            if not selected_docs:
-                return [], False
-
-            placeholders = ",".join("?" for _ in selected_docs)
-            cursor = conn.cursor()
-            cursor.execute(f"""
-                SELECT DISTINCT doc_id FROM tfs
-                WHERE doc_id IN ({placeholders})
-            """, selected_docs)
-
-            all_rows = cursor.fetchall()
-            rows_by_doc = {row["doc_id"]: row for row in all_rows}
-
-            ranked_rows = []
-            for doc_id in selected_docs:
-                if doc_id in rows_by_doc:
-                    ranked_rows.append(rows_by_doc[doc_id])
+    def retrieve(self, terms):
+        selected_docs, scores = self.rank(terms)
+        if not selected_docs:
+            return [], False
 
-            contains_boris_palmer = False
-            page_table = db.PageTable(db.Database(self.index_path))
-            for row in ranked_rows:
-                content = page_table.get_content(row["doc_id"])
-                if content and "boris palmer" in content.lower():
-                    contains_boris_palmer = True
-                    break
+        page_table = db.PageTable(db.Database(self.index_path))
+        with metrics.span("retrieve.fetch_pages"):
+            pages = page_table.get_many(selected_docs)
+        ranked_rows = [pages[doc_id] for doc_id in selected_docs if doc_id in pages]
 
+        with metrics.span("rank.palmer"):
+            contains_boris_palmer = any(
+                row["content"] and "boris palmer" in row["content"].lower()
+                for row in ranked_rows
+            )
         return ranked_rows, contains_boris_palmer
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+
+ROBOTS_TTL = 24 * 60 * 60
+
+
+class RobotsRules:
+    def __init__(self, body, fetched_at, user_agent):
+        self.fetched_at = fetched_at
+        self.parser = None
+        self.crawl_delay = None
+        # Kein robots.txt (Fehler, 404, ...) bedeutet: alles erlaubt
+        if body is not None:
+            self.parser = RobotFileParser()
+            self.parser.parse(body.splitlines())
+            self.crawl_delay = self.parser.crawl_delay(user_agent)
+
+    def allows(self, user_agent, url):
+        return self.parser.can_fetch(user_agent, url) if self.parser else True
+
+
+class RobotsCache:
+    def __init__(self, database, user_agent, ttl=ROBOTS_TTL, timeout=3):
+        self.database = database
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.timeout = timeout
+        self.rules = {}
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.inflight_async = {}
+
+    def allowed(self, url):
+        parsed = urlparse(url)
+        return self._get(parsed).allows(self.user_agent, url)
+
+    async def allowed_async(self, session, url):
+        parsed = urlparse(url)
+        return (await self._get_async(session, parsed)).allows(self.user_agent, url)
+
+    def crawl_delay(self, domain):
+        rules = self.rules.get(domain)
+        return rules.crawl_delay if rules and rules.crawl_delay else 0
+
+    def _get(self, parsed):
+        domain = parsed.netloc
+        rules = self._cached(domain)
+        if rules is not None:
+            return rules
+
+        # Pro Domain nur ein Abruf; andere Aufrufer warten nur auf diese Domain
+        with self.lock:
+            pending = self.inflight.get(domain)
+            owner = pending is None
+            if owner:
+                pending = self.inflight[domain] = threading.Event()
+        if not owner:
+            pending.wait()
+            return self.rules.get(domain) or RobotsRules(None, time.time(), self.user_agent)
+
+        try:
+            return self._store(domain, self._fetch(parsed))
+        finally:
+            with self.lock:
+                del self.inflight[domain]
+            pending.set()
+
+    async def _get_async(self, session, parsed):
+        domain = parsed.netloc
+        rules = self._fresh(domain)
+        if rules is not None:
+            return rules
+
+        pending = self.inflight_async.get(domain)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        pending = self.inflight_async[domain] = loop.create_future()
+        try:
+            # SQLite-Zugriffe blockieren, daher im Thread-Pool statt auf der Event-Loop
+            rules = await loop.run_in_executor(None, self._cached, domain)
+            if rules is None:
+                result = await self._fetch_async(session, parsed)
+                rules = await loop.run_in_executor(None, self._store, domain, result)
+            pending.set_result(rules)
+            return rules
+        except BaseException:
+            # Wartende nicht mit abbrechen: wie im Thread-Pfad bekommen sie die bekannten Regeln oder "alles erlaubt"
+            pending.set_result(self.rules.get(domain) or RobotsRules(None, time.time(), self.user_agent))
+            raise
+        finally:
+            del self.inflight_async[domain]
+
+    def _fetch(self, parsed):
+        try:
+            response = requests.get(f"{parsed.scheme}://{parsed.netloc}/robots.txt",
+                                    headers={'User-Agent': self.user_agent}, timeout=self.timeout)
+            return response.status_code, response.text if response.ok else None
+        except Exception:
+            return 0, None
+
+    async def _fetch_async(self, session, parsed):
+        try:
+            async with session.get(f"{parsed.scheme}://{parsed.netloc}/robots.txt") as response:
+                return response.status, await response.text(errors="replace") if response.ok else None
+        except Exception:
+            return 0, None
+
+    def _fresh(self, domain):
+        rules = self.rules.get(domain)
+        return rules if rules is not None and time.time() - rules.fetched_at < self.ttl else None
+
+    def _cached(self, domain):
+        rules = self._fresh(domain)
+        if rules is not None:
+            return rules
+
+        now = time.time()
+        with self.database.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT body, fetched_at FROM robots WHERE domain = ?", (domain,))
+            row = cursor.fetchone()
+        if row is None or now - row[1] >= self.ttl:
+            return None
+        rules = self.rules[domain] = RobotsRules(row[0], row[1], self.user_agent)
+        return rules
+
+    def _store(self, domain, result):
+        status, body = result
+        rules = RobotsRules(body, time.time(), self.user_agent)
+        with self.database.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO robots (domain, status, body, fetched_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (domain) DO UPDATE SET
+                    status = excluded.status, body = excluded.body, fetched_at = excluded.fetched_at
+            """, (domain, status, body, rules.fetched_at))
+            conn.commit()
+        self.rules[domain] = rules
+        return rules
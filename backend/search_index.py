@@ -0,0 +1,185 @@
+import itertools
+import os
+import threading
+from collections import defaultdict
+import numpy as np
+from scipy import sparse
+import db
+import fingerprint
+import metrics
+import segment
+import weighting
+
+INDEX_FORMAT = os.environ.get("INDEX_FORMAT", "sqlite")
+
+
+class InvertedIndex:
+    def __init__(self, db_path=db.DB_PATH, generation=0):
+        self.db_path = db_path
+        self.generation = generation
+        self.terms = {}
+        self.idf = np.zeros(0, dtype=np.float64)
+        self.max_scores = np.zeros(0, dtype=np.float64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int64)
+        self.weights = np.zeros(0, dtype=np.float64)
+        self.stats_doc_ids = np.zeros(0, dtype=np.int64)
+        self.norms = np.zeros(0, dtype=np.float64)
+        self.mv_scores = np.zeros(0, dtype=np.float64)
+        self.mv_range = None
+        self.signatures = None
+
+    def load(self):
+        with db.Database(self.db_path).connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT term_id, term, idf FROM terms")
+            lexicon = {term_id: (term, idf) for term_id, term, idf in cursor.fetchall()}
+            # Postings blockweise direkt in numpy-Arrays statt Zeile für Zeile in Python-Listen
+            cursor.execute("SELECT term_id, doc_id, tf FROM postings ORDER BY term_id, doc_id")
+            batches = [np.array(rows, dtype=np.float64)
+                       for rows in iter(lambda: cursor.fetchmany(segment.FETCH_SIZE), [])]
+            cursor.execute("SELECT doc_id, signature FROM doc_stats ORDER BY doc_id")
+            stats = cursor.fetchall()
+        postings = np.concatenate(batches) if batches else np.zeros((0, 3), dtype=np.float64)
+
+        term_ids = postings[:, 0].astype(np.int64)
+        starts = np.flatnonzero(np.diff(term_ids, prepend=-1))
+        entries = [lexicon[term_id] for term_id in term_ids[starts].tolist()]
+        self.terms = {term: i for i, (term, _) in enumerate(entries)}
+        self.idf = np.array([idf for _, idf in entries], dtype=np.float64)
+        self.offsets = np.append(starts, len(term_ids))
+        self.doc_ids = postings[:, 1].astype(np.int64)
+        # idf erst hier anwenden, damit inkrementelle Updates nur tf speichern müssen
+        self.weights = postings[:, 2] * np.repeat(self.idf, np.diff(self.offsets))
+        self.stats_doc_ids = np.array([doc_id for doc_id, _ in stats], dtype=np.int64)
+        self.norms, self.mv_scores = weighting.document_statistics(self.stats_doc_ids, self.doc_ids, self.weights)
+        self.max_scores = weighting.term_bounds(self.offsets, self.doc_ids, self.weights, self.stats_doc_ids, self.norms)
+        # Signaturen nur verwenden, wenn der Indexer sie für alle Dokumente berechnet hat
+        signatures = [signature for _, signature in stats]
+        self.signatures = fingerprint.unpack_signatures(signatures) if None not in signatures else None
+        print(f"✅ Index geladen: {len(self.terms)} Terme, {len(self.doc_ids)} Postings")
+        return self
+
+    def postings(self, term):
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return self.doc_ids[:0], self.weights[:0]
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.doc_ids[start:end], self.weights[start:end]
+
+    def get_idf(self, term):
+        term_id = self.terms.get(term)
+        return float(self.idf[term_id]) if term_id is not None else None
+
+    def max_score(self, term):
+        # Obere Schranke für tf-idf / Dokumentnorm über alle Postings des Terms
+        term_id = self.terms.get(term)
+        return float(self.max_scores[term_id]) if term_id is not None else 0.0
+
+    def mv_score_range(self):
+        if self.mv_range is None:
+            values = self.mv_scores[~np.isnan(self.mv_scores)]
+            self.mv_range = (float(values.min()), float(values.max())) if len(values) else (0.0, 0.0)
+        return self.mv_range
+
+    def _norm_ratios(self, doc_ids, weights):
+        # Wie Ranker.normalize_rows: Norm 0 bleibt unskaliert; ohne Statistik ist keine Schranke möglich
+        norms, _ = self.doc_stats(doc_ids)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(np.isnan(norms), np.inf, np.where(norms > 0, weights / norms, weights))
+
+    def candidate_matrix(self, terms):
+        columns = list(dict.fromkeys(terms))
+        postings = [self.postings(term) for term in columns]
+        all_doc_ids = np.concatenate([doc_ids for doc_ids, _ in postings]) if postings else self.doc_ids[:0]
+        doc_ids, rows = np.unique(all_doc_ids, return_inverse=True)
+        cols = np.repeat(np.arange(len(columns)), [len(ids) for ids, _ in postings])
+        data = np.concatenate([weights for _, weights in postings]) if postings else self.weights[:0]
+        matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(doc_ids), len(columns)))
+        return doc_ids, columns, matrix
+
+    def doc_stats(self, doc_ids):
+        positions = np.searchsorted(self.stats_doc_ids, doc_ids)
+        positions = np.minimum(positions, max(len(self.stats_doc_ids) - 1, 0))
+        found = self.stats_doc_ids[positions] == doc_ids if len(self.stats_doc_ids) else np.zeros(len(doc_ids), dtype=bool)
+        norms = np.full(len(doc_ids), np.nan)
+        mv_scores = np.full(len(doc_ids), np.nan)
+        norms[found] = self.norms[positions[found]]
+        mv_scores[found] = self.mv_scores[positions[found]]
+        return norms, mv_scores
+
+    def doc_signatures(self, doc_ids):
+        if self.signatures is None or len(self.stats_doc_ids) == 0:
+            return None
+        positions = np.minimum(np.searchsorted(self.stats_doc_ids, doc_ids), len(self.stats_doc_ids) - 1)
+        if not np.all(self.stats_doc_ids[positions] == doc_ids):
+            return None
+        return self.signatures[positions]
+
+    def idf_values(self, terms):
+        return {term: idf for term in terms if (idf := self.get_idf(term)) is not None}
+
+    def total_scores(self, terms):
+        totals = defaultdict(float)
+        for term in set(terms):
+            doc_ids, weights = self.postings(term)
+            for doc_id, weight in zip(doc_ids.tolist(), weights.tolist()):
+                totals[doc_id] += weight
+        return dict(totals)
+
+
+class SegmentIndex(InvertedIndex):
+    def load(self):
+        directory = segment.current_segment(self.db_path)
+        if directory is None:
+            raise FileNotFoundError(f"Kein Index-Segment für {self.db_path} gefunden")
+        self.segment = segment.Segment(directory)
+        self.stats_doc_ids = self.segment.doc_stats["doc_id"]
+        self.norms = self.segment.doc_stats["norm"]
+        self.mv_scores = self.segment.doc_stats["mv_score"]
+        self.signatures = self.segment.signatures
+        print(f"✅ Index-Segment geöffnet: {directory}")
+        return self
+
+    def postings(self, term):
+        return self.segment.postings(term)
+
+    def get_idf(self, term):
+        entry = self.segment.find(term)
+        return float(entry["idf"]) if entry is not None else None
+
+    def max_score(self, term):
+        bound = self.segment.max_score(term)
+        if bound is None:
+            ratios = self._norm_ratios(*self.postings(term))
+            bound = float(ratios.max()) if len(ratios) else 0.0
+        return bound
+
+
+def _load_index(db_path):
+    if INDEX_FORMAT == "segment" and segment.current_segment(db_path) is not None:
+        return SegmentIndex(db_path, next(_generations)).load()
+    return InvertedIndex(db_path, next(_generations)).load()
+
+
+_index = None
+_index_lock = threading.Lock()
+_generations = itertools.count(1)
+
+
+def get_index(db_path=db.DB_PATH):
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                with metrics.span("index.load"):
+                    _index = _load_index(db_path)
+    return _index
+
+
+def reload_index(db_path=db.DB_PATH):
+    global _index
+    index = _load_index(db_path)
+    with _index_lock:
+        _index = index
+    return index
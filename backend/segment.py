@@ -0,0 +1,241 @@
+import json
+import mmap
+import os
+import shutil
+import time
+import numpy as np
+import db
+import fingerprint
+import weighting
+
+LEXICON_DTYPE = np.dtype([
+    ("term_offset", "<u8"),
+    ("term_length", "<u4"),
+    ("df", "<u4"),
+    ("idf", "<f8"),
+    ("docs_offset", "<u8"),
+    ("docs_length", "<u8"),
+    ("weights_offset", "<u8"),
+    ("count", "<u8"),
+    ("scale", "<f8"),
+])
+STATS_DTYPE = np.dtype([
+    ("doc_id", "<i8"),
+    ("norm", "<f8"),
+    ("mv_score", "<f8"),
+])
+WEIGHT_LEVELS = 65535
+FETCH_SIZE = 200000
+CURRENT_FILE = "CURRENT"
+
+
+def segment_root(db_path):
+    return os.path.join(os.path.dirname(db_path), "segments")
+
+
+def current_segment(db_path):
+    root = segment_root(db_path)
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    directory = os.path.join(root, name)
+    return directory if name and os.path.isdir(directory) else None
+
+
+def varint_lengths(values):
+    # Anzahl der 7-Bit-Gruppen pro Wert
+    lengths = np.ones(len(values), dtype=np.int64)
+    rest = np.asarray(values, dtype=np.uint64) >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+    return lengths
+
+
+def encode_varints(values, lengths=None):
+    values = np.asarray(values, dtype=np.uint64)
+    if lengths is None:
+        lengths = varint_lengths(values)
+    owner = np.repeat(np.arange(len(values)), lengths)
+    ends = np.cumsum(lengths)
+    group = np.arange(ends[-1] if len(ends) else 0) - (ends - lengths)[owner]
+    out = ((values[owner] >> (group * 7).astype(np.uint64)) & np.uint64(0x7F)).astype(np.uint8)
+    # Fortsetzungsbit auf allen Gruppen außer der letzten eines Werts
+    out[group < lengths[owner] - 1] |= 0x80
+    return out
+
+
+def decode_varints(buf):
+    if len(buf) == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(buf < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    owner = np.repeat(np.arange(len(ends)), ends - starts + 1)
+    shifts = ((np.arange(len(buf)) - starts[owner]) * 7).astype(np.uint64)
+    parts = (buf & 0x7F).astype(np.uint64) << shifts
+    return np.add.reduceat(parts, starts).astype(np.int64)
+
+
+class SegmentWriter:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.root = segment_root(db_path)
+
+    def write(self):
+        # Schreibt immer die ganze Generation neu; die Kosten bestimmt das Lesen aller Postings aus SQLite
+        start = time.time()
+        name = f"gen-{time.time_ns()}"
+        directory = os.path.join(self.root, name)
+        os.makedirs(directory)
+
+        with db.Database(self.db_path).connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT term_id, term, df, idf FROM terms")
+            terms = sorted(cursor.fetchall(), key=lambda row: row[1].encode("utf-8"))
+            positions = {term_id: i for i, (term_id, _, _, _) in enumerate(terms)}
+            lexicon = np.zeros(len(terms), dtype=LEXICON_DTYPE)
+
+            encoded_terms = [term.encode("utf-8") for _, term, _, _ in terms]
+            term_lengths = np.array([len(encoded) for encoded in encoded_terms], dtype=np.int64)
+            term_bytes = b"".join(encoded_terms)
+            lexicon["term_offset"] = np.cumsum(term_lengths) - term_lengths
+            lexicon["term_length"] = term_lengths
+            lexicon["df"] = [df for _, _, df, _ in terms]
+            lexicon["idf"] = [idf for _, _, _, idf in terms]
+
+            cursor.execute("SELECT doc_id, signature FROM doc_stats ORDER BY doc_id")
+            doc_rows = cursor.fetchall()
+            cursor.execute("SELECT term_id, doc_id, tf FROM postings ORDER BY term_id, doc_id")
+            batches = [np.array(rows, dtype=np.float64) for rows in iter(lambda: cursor.fetchmany(FETCH_SIZE), [])]
+        postings = np.concatenate(batches) if batches else np.zeros((0, 3), dtype=np.float64)
+
+        term_ids = postings[:, 0].astype(np.int64)
+        doc_ids = postings[:, 1].astype(np.int64)
+        starts = np.flatnonzero(np.diff(term_ids, prepend=-1))
+        ends = np.append(starts[1:], len(term_ids))
+        rows = np.array([positions[term_id] for term_id in term_ids[starts].tolist()], dtype=np.int64)
+        weights = postings[:, 2] * np.repeat(lexicon["idf"][rows], ends - starts)
+
+        # Norm und mv-Score wie im residenten Index aus den vollen Gewichten, vor der Quantisierung
+        stats = np.zeros(len(doc_rows), dtype=STATS_DTYPE)
+        stats["doc_id"] = [doc_id for doc_id, _ in doc_rows]
+        stats["norm"], stats["mv_score"] = weighting.document_statistics(stats["doc_id"], doc_ids, weights)
+        signatures = [signature for _, signature in doc_rows]
+        bounds = np.zeros(len(terms), dtype="<f8")
+
+        # Alle Terme auf einmal, in term_id-Reihenfolge hintereinander in den Dateien.
+        # Doc-IDs als Deltas (pro Term ab 0), Gewichte als uint16 relativ zum Termmaximum
+        deltas = np.diff(doc_ids, prepend=0)
+        deltas[starts] = doc_ids[starts]
+        lengths = varint_lengths(deltas)
+        docs_lengths = np.add.reduceat(lengths, starts) if len(starts) else np.zeros(0, dtype=np.int64)
+        max_weights = np.maximum.reduceat(weights, starts) if len(starts) else np.zeros(0)
+        scales = np.where(max_weights > 0, max_weights / WEIGHT_LEVELS, 0.0)
+        posting_scales = np.repeat(scales, ends - starts)
+        quantized = np.rint(weights / np.where(posting_scales > 0, posting_scales, 1.0))
+        quantized[posting_scales == 0] = 0
+
+        lexicon["docs_offset"][rows] = np.cumsum(docs_lengths) - docs_lengths
+        lexicon["docs_length"][rows] = docs_lengths
+        lexicon["weights_offset"][rows] = starts
+        lexicon["count"][rows] = ends - starts
+        lexicon["scale"][rows] = scales
+        # Schranke aus den quantisierten Gewichten, damit sie für die gelesenen Werte exakt gilt
+        bounds[rows] = weighting.term_bounds(np.append(starts, len(doc_ids)), doc_ids, quantized * posting_scales,
+                                             stats["doc_id"], stats["norm"])
+        weights_offset = len(doc_ids)
+
+        encode_varints(deltas, lengths).tofile(os.path.join(directory, "docids.bin"))
+        quantized.astype("<u2").tofile(os.path.join(directory, "weights.bin"))
+
+        with open(os.path.join(directory, "terms.bin"), "wb") as f:
+            f.write(term_bytes)
+        lexicon.tofile(os.path.join(directory, "lexicon.bin"))
+        bounds.tofile(os.path.join(directory, "bounds.bin"))
+        if None not in signatures:
+            with open(os.path.join(directory, "signatures.bin"), "wb") as f:
+                f.write(b"".join(signatures))
+        stats.tofile(os.path.join(directory, "docstats.bin"))
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"terms": len(terms), "postings": weights_offset, "documents": len(stats),
+                       "weight_levels": WEIGHT_LEVELS}, f)
+
+        self._activate(name)
+        print(f"✅ Index-Segment {name} geschrieben in {time.time() - start:.2f} sec")
+        return directory
+
+    def _activate(self, name):
+        previous = current_segment(self.db_path)
+        pointer = os.path.join(self.root, CURRENT_FILE)
+        with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(pointer + ".tmp", pointer)
+
+        # Ältere Generationen entfernen; die vorherige bleibt für Prozesse, die sie gerade öffnen
+        keep = {name, os.path.basename(previous) if previous else None}
+        for entry in os.listdir(self.root):
+            if entry.startswith("gen-") and entry not in keep:
+                shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
+
+
+class Segment:
+    def __init__(self, directory):
+        self.directory = directory
+        self.lexicon = self._map("lexicon.bin", LEXICON_DTYPE)
+        self.term_bytes = self._map("terms.bin", np.uint8)
+        self.docids = self._map("docids.bin", np.uint8)
+        self.weights = self._map("weights.bin", np.dtype("<u2"))
+        self.doc_stats = self._map("docstats.bin", STATS_DTYPE)
+        # Ältere Segmente ohne Schranken: werden beim Lesen aus den Postings berechnet
+        has_bounds = os.path.exists(os.path.join(directory, "bounds.bin"))
+        self.bounds = self._map("bounds.bin", np.dtype("<f8")) if has_bounds else None
+        has_signatures = os.path.exists(os.path.join(directory, "signatures.bin"))
+        self.signatures = self._map("signatures.bin", np.dtype("<u8")).reshape(-1, fingerprint.SIGNATURE_WORDS) \
+            if has_signatures else None
+
+    def _map(self, filename, dtype):
+        with open(os.path.join(self.directory, filename), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return np.zeros(0, dtype=dtype)
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return np.frombuffer(mapped, dtype=dtype)
+
+    def _term_at(self, position):
+        entry = self.lexicon[position]
+        start = int(entry["term_offset"])
+        return self.term_bytes[start:start + int(entry["term_length"])].tobytes()
+
+    def find(self, term):
+        position = self.find_position(term)
+        return self.lexicon[position] if position is not None else None
+
+    def find_position(self, term):
+        key = term.encode("utf-8")
+        lo, hi = 0, len(self.lexicon)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.lexicon) and self._term_at(lo) == key:
+            return lo
+        return None
+
+    def max_score(self, term):
+        position = self.find_position(term)
+        if position is None or self.bounds is None:
+            return None
+        return float(self.bounds[position])
+
+    def postings(self, term):
+        entry = self.find(term)
+        if entry is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        start = int(entry["docs_offset"])
+        doc_ids = np.cumsum(decode_varints(self.docids[start:start + int(entry["docs_length"])]))
+        start = int(entry["weights_offset"])
+        weights = self.weights[start:start + int(entry["count"])] * float(entry["scale"])
+        return doc_ids, weights
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def _rows(stats_doc_ids, doc_ids):
+    # Zeile in doc_stats pro Posting; Dokumente ohne Statistik (z. B. nach der tfs-Migration) gelten als nicht gefunden
+    if not len(stats_doc_ids):
+        return np.zeros(len(doc_ids), dtype=np.intp), np.zeros(len(doc_ids), dtype=bool)
+    rows = np.minimum(np.searchsorted(stats_doc_ids, doc_ids), len(stats_doc_ids) - 1)
+    return rows, stats_doc_ids[rows] == doc_ids
+
+
+def document_statistics(stats_doc_ids, doc_ids, weights):
+    # Norm und mean - variance der tf-idf-Gewichte pro Dokument. Über idf hängen sie vom ganzen Korpus ab,
+    # deshalb werden sie beim Laden aus den Postings berechnet statt bei jedem Update für alle Dokumente gespeichert
+    rows, found = _rows(stats_doc_ids, doc_ids)
+    rows, weights = rows[found], weights[found]
+    counts = np.bincount(rows, minlength=len(stats_doc_ids))
+    totals = np.bincount(rows, weights=weights, minlength=len(stats_doc_ids))
+    squares = np.bincount(rows, weights=weights * weights, minlength=len(stats_doc_ids))
+    safe_counts = np.maximum(counts, 1)
+    mean = totals / safe_counts
+    variance = np.maximum(squares / safe_counts - mean * mean, 0.0)
+    return np.sqrt(squares), mean - variance
+
+
+def term_bounds(offsets, doc_ids, weights, stats_doc_ids, norms):
+    # Größter Beitrag eines Terms zur Kosinus-Ähnlichkeit (tf-idf / Dokumentnorm), Schranke für das Pruning.
+    # Ohne Dokumentnorm ist keine Schranke möglich, wie in SegmentIndex._norm_ratios
+    bounds = np.zeros(len(offsets) - 1, dtype=np.float64)
+    if not len(weights):
+        return bounds
+    rows, found = _rows(stats_doc_ids, doc_ids)
+    doc_norms = np.where(found, norms[rows] if len(norms) else 0.0, 0.0)
+    ratios = np.where(doc_norms > 0, weights / np.where(doc_norms > 0, doc_norms, 1.0), weights)
+    ratios[~found] = np.inf
+    # reduceat liefert für leere Terme den Wert an der Startposition, deshalb nur nichtleere Terme belegen
+    nonempty = np.flatnonzero(np.diff(offsets) > 0)
+    bounds[nonempty] = np.maximum.reduceat(ratios, offsets[nonempty])
+    return bounds
@@ -7,6 +7,8 @@ function getQueryParam(name) {
   return new URLSearchParams(window.location.search).get(name) || "";
 }
 
+const PAGE_SIZE = 10;
+
 /**
  * Erstellt einen HTML-Block für ein Ergebnis
  * @param {Object} result - Ein Eintrag vom Backend
@@ -45,16 +47,45 @@ function renderResults(data) {
   
 }
 
+/**
+ * Baut die Seitennavigation für die aktuelle Ergebnismenge
+ * @param {Object} page - Antwort der paginierten Such-API
+ */
+function renderPagination(page) {
+  const nav = document.getElementById("pagination");
+  if (!nav) return;
+  nav.innerHTML = "";
+
+  const currentPage = Math.floor(page.offset / page.limit) + 1;
+  const pageCount = Math.ceil(page.total / page.limit);
+  if (pageCount <= 1) return;
+  const tokenParam = page.token ? `&token=${encodeURIComponent(page.token)}` : "";
+
+  for (let i = 1; i <= pageCount; i++) {
+    const link = document.createElement("a");
+    link.textContent = i;
+    link.className = i === currentPage ? "page-link active" : "page-link";
+    link.href = `result.html?q=${encodeURIComponent(page.query)}&page=${i}${tokenParam}`;
+    nav.appendChild(link);
+  }
+}
+
 function initSearchPage() {
   const query = getQueryParam("q");
+  const pageNumber = Math.max(parseInt(getQueryParam("page"), 10) || 1, 1);
+  const token = getQueryParam("token");
 
   const input = document.getElementById("searchBox");
   if (input) input.value = query;
 
   if (query.trim()) {
-    fetch(`http://localhost:5050/api/search?q=${encodeURIComponent(query)}`)
+    const offset = (pageNumber - 1) * PAGE_SIZE;
+    fetch(`http://localhost:5050/api/search?q=${encodeURIComponent(query)}&offset=${offset}&limit=${PAGE_SIZE}&token=${encodeURIComponent(token)}`)
       .then(res => res.json())
-      .then(renderResults)
+      .then(page => {
+        renderResults(page.results);
+        renderPagination(page);
+      })
       .catch(err => {
         console.error("Fehler beim Laden der Ergebnisse:", err);
         document.getElementById("results").innerText = "Fehler beim Laden der Ergebnisse.";